@@ -38,13 +38,25 @@ export interface OrderType {
   date: string;
 }
 
+interface OrderPage {
+  results: OrderType[];
+  next_cursor: string | null;
+  total?: number;
+}
+
+// Admin list: orders are read a page at a time (keyset pagination on the backend)
+const ORDERS_PAGE_SIZE = 50;
+
 interface OrderContextType {
   orders: OrderType[];
   allOrders: OrderType[];
+  totalOrders: number;
+  hasMoreOrders: boolean;
   featuredOrders: OrderType[];
   loading: boolean;
   fetchOrdersByUser: (showNotification?: boolean) => void;
   fetchAllOrders: (showNotification?: boolean) => void;
+  loadMoreOrders: () => Promise<void>;
   deleteOrder: (orderId: string) => Promise<void>;
   getOrder: (orderId: string) => Promise<OrderType | null>;
 }
@@ -58,6 +70,8 @@ export const OrderProvider: React.FC<{ children: React.ReactNode }> = ({ childre
 
   const [orders, setOrders] = useState<OrderType[]>([]);
   const [allOrders, setAllOrders] = useState<OrderType[]>([]);
+  const [totalOrders, setTotalOrders] = useState<number>(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState<boolean>(true);
 
   const fetchOrdersByUser = async (showNotification = false) => {
@@ -77,24 +91,44 @@ export const OrderProvider: React.FC<{ children: React.ReactNode }> = ({ childre
     }
   };
 
-  // 👉 Fetch ALL orders (admin)
+  // 👉 Fetch the first page of all orders (admin)
   const fetchAllOrders = async (showNotification = false) => {
     setLoading(true);
     try {
-      const response = await axios.get(`${apiUrl}/api/orders/`, {
+      const response = await axios.get<OrderPage>(`${apiUrl}/api/orders/`, {
         headers: { Authorization: `Bearer ${token}` },
+        params: { limit: ORDERS_PAGE_SIZE },
       });
-      setAllOrders(response.data || []);
+      setAllOrders(response.data.results || []);
+      setNextCursor(response.data.next_cursor);
+      setTotalOrders(response.data.total ?? 0);
 
       if (showNotification) success('All orders loaded successfully.');
     } catch (err) {
       setAllOrders([]);
+      setNextCursor(null);
+      setTotalOrders(0);
       error('Unable to load all orders.');
     } finally {
       setLoading(false);
     }
   };
 
+  // 👉 Append the next page (the total is already known)
+  const loadMoreOrders = async () => {
+    if (!nextCursor) return;
+    try {
+      const response = await axios.get<OrderPage>(`${apiUrl}/api/orders/`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: ORDERS_PAGE_SIZE, cursor: nextCursor, count: false },
+      });
+      setAllOrders(prev => [...prev, ...(response.data.results || [])]);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      error('Unable to load more orders.');
+    }
+  };
+
   const deleteOrder = async (orderId: string) => {
     try {
       await axios.delete(`${apiUrl}/api/orders/${orderId}/delete/`, {
@@ -104,6 +138,7 @@ export const OrderProvider: React.FC<{ children: React.ReactNode }> = ({ childre
       // Remove from both lists (for admin + user dashboard)
       setOrders(prev => prev.filter(order => order._id !== orderId));
       setAllOrders(prev => prev.filter(order => order._id !== orderId));
+      setTotalOrders(prev => Math.max(0, prev - 1));
 
       success("Order deleted successfully.");
     } catch (err) {
@@ -131,7 +166,7 @@ export const OrderProvider: React.FC<{ children: React.ReactNode }> = ({ childre
   const featuredOrders = orders.slice(0, 4);
 
   return (
-    <OrderContext.Provider value={{ orders, allOrders, featuredOrders, loading, fetchOrdersByUser, fetchAllOrders, deleteOrder, getOrder }}>
+    <OrderContext.Provider value={{ orders, allOrders, totalOrders, hasMoreOrders: nextCursor !== null, featuredOrders, loading, fetchOrdersByUser, fetchAllOrders, loadMoreOrders, deleteOrder, getOrder }}>
       {children}
     </OrderContext.Provider>
   );
@@ -106,6 +106,21 @@ export const UserProvider: React.FC<{ children: React.ReactNode }> = ({ children
     window.location.href = "/";
   };
 
+  // A rejected token (expired, signed with an old key, banned user): log out
+  // instead of failing every request
+  useEffect(() => {
+    const interceptor = axios.interceptors.response.use(
+      (response) => response,
+      (err) => {
+        if (err.response?.status === 401 && err.config?.headers?.Authorization) {
+          logout();
+        }
+        return Promise.reject(err);
+      }
+    );
+    return () => axios.interceptors.response.eject(interceptor);
+  }, []);
+
 
   const fetchUsersForAdmin = async () => {
     
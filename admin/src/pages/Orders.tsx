@@ -17,7 +17,7 @@ const statusBadgeClass: Record<string, string> = {
 };
 
 export default function Orders() {
-  const { allOrders, fetchAllOrders, loading, deleteOrder, getOrder } = useOrders();
+  const { allOrders, totalOrders, hasMoreOrders, fetchAllOrders, loadMoreOrders, loading, deleteOrder, getOrder } = useOrders();
   const [search, setSearch] = useState("");
 
 
@@ -185,7 +185,7 @@ export default function Orders() {
       <div className="page-header">
         <div>
           <h1>Orders</h1>
-          <p>Manage and track customer orders.</p>
+          <p>Manage and track customer orders ({allOrders.length} of {totalOrders} loaded).</p>
         </div>
         <div className="page-header-actions">
           <button className="btn btn-primary" title="Export Orders" onClick={exportOrdersToPDF}>Export Orders</button>
@@ -276,6 +276,15 @@ export default function Orders() {
             </table>
           </div>
         )}
+
+        {/* NEXT PAGE: search and export only cover the loaded orders */}
+        {!loading && hasMoreOrders && (
+          <div style={{ padding: "1rem", textAlign: "center" }}>
+            <button className="btn btn-secondary" onClick={loadMoreOrders} title="Load more orders">
+              Load more orders
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Delete Confirmation Modal */}
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Mount the async read path (/api/async/), which only makes sense on an event loop
+os.environ['SERVE_ASYNC_API'] = 'True'
 
 application = get_asgi_application()
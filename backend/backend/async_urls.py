@@ -0,0 +1,24 @@
+"""
+The async read path: native async views for the hot read endpoints, mounted
+under /api/async/ with the same paths, params and JSON as their DRF versions.
+They only pay off under an ASGI server (backend/asgi.py), e.g.
+
+    uvicorn backend.asgi:application --workers 4
+
+Compare both paths with loadtest.py.
+"""
+from django.urls import path
+
+from orders import async_views as orders
+from products import async_views as products
+from stats import async_views as stats
+from users import async_views as users
+
+urlpatterns = [
+    path("products/", products.product_list),
+    path("products/<str:product_id>", products.product_detail),
+    path("users/cart/<str:user_id>/", users.get_user_cart),
+    path("orders/", orders.all_orders),
+    path("orders/<str:user_id>/", orders.user_orders),
+    path("stats/dashboard/", stats.dashboard_stats),
+]
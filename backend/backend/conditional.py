@@ -0,0 +1,95 @@
+"""
+HTTP conditional GET (ETag / Last-Modified) for read endpoints.
+
+Every cacheable collection has a version counter in the "collection_versions"
+Mongo collection, bumped by the views that write to it. A read endpoint tags
+its response with the current version; a client (or CDN) that sends it back
+in If-None-Match gets a 304 before anything is queried or serialized.
+
+Reading the counter is one tiny indexed read, and is skipped for
+VERSION_TTL seconds after the last read in this process.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.utils.http import http_date, parse_http_date_safe
+from mongoengine.connection import get_db
+from pymongo import ReturnDocument
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSIONS_COLLECTION = "collection_versions"
+VERSION_TTL = 1.0
+
+_versions = {}
+_lock = threading.Lock()
+
+
+def _collection():
+    return get_db()[VERSIONS_COLLECTION]
+
+
+def _remember(name, doc):
+    version = (doc["version"], doc["updated_at"].replace(tzinfo=timezone.utc))
+    with _lock:
+        _versions[name] = (version, time.monotonic() + VERSION_TTL)
+    return version
+
+
+def get_version(name):
+    """
+    Returns (version, updated_at) of a collection.
+    """
+    with _lock:
+        cached = _versions.get(name)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    doc = _collection().find_one({"_id": name})
+    if doc is None:
+        return bump_version(name, inc=0)
+    return _remember(name, doc)
+
+
+def bump_version(name, inc=1):
+    """
+    Call after any write to the collection; every ETag handed out for it becomes stale.
+    """
+    doc = _collection().find_one_and_update(
+        {"_id": name},
+        {"$inc": {"version": inc}, "$set": {"updated_at": datetime.utcnow().replace(microsecond=0)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return _remember(name, doc)
+
+
+def _etag_matches(header, etag):
+    # Weak comparison (RFC 9110 8.8.3.2)
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def conditional_response(request, name, build, cache_control, vary="Accept"):
+    """
+    Answers a GET on data from collection `name`.
+    build() returns the full Response and is only called if the client's copy is stale.
+    """
+    version, updated_at = get_version(name)
+    etag = f'W/"{name}-{version}"'
+
+    if_none_match = request.headers.get("If-None-Match")
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since") or "")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    else:
+        fresh = if_modified_since is not None and int(updated_at.timestamp()) <= if_modified_since
+
+    response = Response(status=status.HTTP_304_NOT_MODIFIED) if fresh else build()
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(updated_at.timestamp())
+        response["Cache-Control"] = cache_control
+        response["Vary"] = vary
+    return response
@@ -0,0 +1,37 @@
+"""
+GET /health/db: database health for load balancers and monitoring.
+
+Pings the server (opening the lazy connection if needed) and reports the
+connection pool counters collected by backend.mongo.PoolMonitor.
+Answers 503 when MongoDB cannot be reached.
+"""
+import time
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from mongoengine.connection import get_db
+from pymongo.errors import PyMongoError
+
+from .mongo import pool_monitor
+
+
+@require_GET
+def health_db(request):
+    start = time.perf_counter()
+    try:
+        get_db().command("ping")
+    except PyMongoError as e:
+        return JsonResponse({
+            "status": "unavailable",
+            "error": str(e),
+            "pools": pool_monitor.stats(),
+        }, status=503)
+
+    return JsonResponse({
+        "status": "ok",
+        "ping_ms": round((time.perf_counter() - start) * 1000, 3),
+        "max_pool_size": settings.MONGO["MAX_POOL_SIZE"],
+        "min_pool_size": settings.MONGO["MIN_POOL_SIZE"],
+        "pools": pool_monitor.stats(),
+    })
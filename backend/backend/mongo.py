@@ -0,0 +1,154 @@
+"""
+MongoDB connection setup.
+
+settings.py registers the MongoEngine connection with connect_mongo(). The
+client is created with connect=False, so nothing touches the network until
+the first query: manage.py commands and worker startup do not wait for (or
+hang on) the cluster.
+
+Pool behaviour is tracked with a PyMongo CMAP (connection monitoring and
+pooling) listener, reported by /health/db (backend/health.py).
+
+This module is imported by settings.py and must not import Django settings.
+"""
+import importlib.util
+import threading
+
+import certifi
+from mongoengine import connect
+from pymongo import monitoring
+
+# Compressors need optional packages; zlib is always available
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def available_compressors(names):
+    """
+    Keeps the compressors of "zstd,snappy,zlib" whose module is installed,
+    so PyMongo does not warn about the others.
+    """
+    wanted = [name.strip() for name in (names or "").split(",") if name.strip()]
+    return [name for name in wanted if importlib.util.find_spec(COMPRESSOR_MODULES.get(name, name))]
+
+
+def client_options(config):
+    """
+    MongoClient keyword arguments for a settings.MONGO dict (shared by the
+    sync MongoEngine connection and the async client).
+    """
+    options = {
+        "maxPoolSize": config["MAX_POOL_SIZE"],
+        "minPoolSize": config["MIN_POOL_SIZE"],
+        "maxIdleTimeMS": config["MAX_IDLE_TIME_MS"],
+        "waitQueueTimeoutMS": config["WAIT_QUEUE_TIMEOUT_MS"],
+        "serverSelectionTimeoutMS": config["SERVER_SELECTION_TIMEOUT_MS"],
+        "connectTimeoutMS": config["CONNECT_TIMEOUT_MS"],
+        "socketTimeoutMS": config["SOCKET_TIMEOUT_MS"],
+        "readPreference": config["READ_PREFERENCE"],
+        "tlsCAFile": certifi.where(),
+    }
+    compressors = available_compressors(config["COMPRESSORS"])
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Counts the pool events of every server the client talks to.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+
+    def _pool(self, address):
+        key = f"{address[0]}:{address[1]}"
+        if key not in self._pools:
+            self._pools[key] = {
+                "open": 0,
+                "in_use": 0,
+                "created": 0,
+                "closed": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "cleared": 0,
+                "max_wait_ms": 0.0,
+                "total_wait_ms": 0.0,
+                "ready": False,
+            }
+        return self._pools[key]
+
+    def _update(self, address, **changes):
+        with self._lock:
+            pool = self._pool(address)
+            for field, value in changes.items():
+                if field == "max_wait_ms":
+                    pool[field] = max(pool[field], value)
+                elif isinstance(value, bool):
+                    pool[field] = value
+                else:
+                    pool[field] += value
+
+    def stats(self):
+        with self._lock:
+            return {
+                address: {
+                    **pool,
+                    "avg_wait_ms": round(pool["total_wait_ms"] / pool["checkouts"], 3) if pool["checkouts"] else 0.0,
+                    "max_wait_ms": round(pool["max_wait_ms"], 3),
+                    "total_wait_ms": round(pool["total_wait_ms"], 3),
+                }
+                for address, pool in self._pools.items()
+            }
+
+    # ---- CMAP events ----
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        self._update(event.address, ready=True)
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared=1, ready=False)
+
+    def pool_closed(self, event):
+        self._update(event.address, ready=False)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1, created=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1, closed=1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, checkout_failures=1)
+
+    def connection_checked_out(self, event):
+        # duration: time spent waiting for the connection (PyMongo >= 4.7)
+        wait_ms = getattr(event, "duration", 0.0) * 1000
+        self._update(event.address, in_use=1, checkouts=1, total_wait_ms=wait_ms, max_wait_ms=wait_ms)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+
+pool_monitor = PoolMonitor()
+
+
+def connect_mongo(config):
+    """
+    Registers the default MongoEngine connection without opening it.
+    """
+    return connect(
+        host=config["URI"],
+        connect=False,
+        event_listeners=[pool_monitor],
+        **client_options(config),
+    )
@@ -0,0 +1,37 @@
+"""
+Async MongoDB access for the ASGI read path (backend/async_urls.py).
+
+Uses PyMongo's native asyncio client, next to the synchronous MongoEngine
+connection the rest of the app uses, and with the same URI and database.
+An async client belongs to the event loop it was created on, so there is one
+per running loop: one per ASGI worker. backend/urls.py only mounts these
+views under ASGI, where the loop lives as long as the worker; under WSGI
+each request would get a fresh loop and leak its client.
+"""
+import asyncio
+import weakref
+
+from django.conf import settings
+from mongoengine.connection import DEFAULT_DATABASE_NAME
+from pymongo import AsyncMongoClient
+
+from .mongo import client_options
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_db():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # Same pool / timeout / compression settings as the sync connection
+        client = AsyncMongoClient(settings.MONGO["URI"], **client_options(settings.MONGO))
+        _clients[loop] = client
+    return client.get_default_database(DEFAULT_DATABASE_NAME)
+
+
+def async_collection(document):
+    """
+    The async collection behind a MongoEngine Document class.
+    """
+    return get_async_db()[document._get_collection_name()]
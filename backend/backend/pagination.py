@@ -0,0 +1,128 @@
+"""
+Keyset (cursor) pagination helpers shared by the list endpoints.
+
+A page is always sorted on (sort_field, _id) so the order is total, and the
+cursor handed back to the client is the (value, _id) pair of the last row.
+The next page is fetched with a range query on that pair instead of skip(),
+so every page costs the same no matter how deep the client scrolls.
+"""
+import base64
+import binascii
+import datetime
+
+from bson import ObjectId, json_util
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# A cursor value ends up inside a query, so only plain values are accepted:
+# a dict such as {"$ne": null} would be read as an operator
+CURSOR_VALUE_TYPES = (str, int, float, bool, datetime.datetime, ObjectId, type(None))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """
+    Parses the ?limit= query param. Raises ValueError on bad input.
+    """
+    if value in (None, ""):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def encode_cursor(values):
+    """
+    Encodes the sort key values of a row (datetimes and ObjectIds included) as an opaque token.
+    """
+    raw = json_util.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json_util.loads(raw)
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or not values:
+        raise InvalidCursor("Invalid cursor")
+    if any(not isinstance(value, CURSOR_VALUE_TYPES) for value in values):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def keyset_query(sort_field, descending, cursor_values):
+    """
+    Builds the raw Mongo filter that selects the rows after cursor_values
+    in (sort_field, _id) order.
+    """
+    op = "$lt" if descending else "$gt"
+
+    if sort_field == "_id":
+        return {"_id": {op: cursor_values[-1]}}
+
+    if len(cursor_values) != 2:
+        raise InvalidCursor("Invalid cursor")
+    value, last_id = cursor_values
+    return {"$or": [
+        {sort_field: {op: value}},
+        {sort_field: value, "_id": {op: last_id}},
+    ]}
+
+
+def _sort_value(doc, sort_field):
+    # Works on both MongoEngine documents and as_pymongo() dicts
+    if isinstance(doc, dict):
+        return doc.get(sort_field)
+    return doc.id if sort_field == "_id" else getattr(doc, sort_field)
+
+
+def paginate(queryset, sort_field="_id", descending=False, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Returns (rows, next_cursor) for one page of queryset.
+    next_cursor is None when there is nothing left to read.
+    """
+    if cursor:
+        queryset = queryset.filter(__raw__=keyset_query(sort_field, descending, decode_cursor(cursor)))
+
+    direction = "-" if descending else "+"
+    if sort_field == "_id":
+        queryset = queryset.order_by(f"{direction}id")
+    else:
+        queryset = queryset.order_by(f"{direction}{sort_field}", f"{direction}id")
+
+    # Read one extra row to know whether another page exists
+    return _page(list(queryset.limit(limit + 1)), sort_field, limit)
+
+
+async def apaginate(collection, query, sort_field="_id", descending=False, limit=DEFAULT_PAGE_SIZE,
+                    cursor=None, projection=None):
+    """
+    paginate() for the async read path: runs on an async PyMongo collection
+    with a raw filter and returns (raw rows, next_cursor).
+    """
+    if cursor:
+        query = {"$and": [query, keyset_query(sort_field, descending, decode_cursor(cursor))]}
+
+    direction = -1 if descending else 1
+    sort = [("_id", direction)] if sort_field == "_id" else [(sort_field, direction), ("_id", direction)]
+    rows = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list()
+    return _page(rows, sort_field, limit)
+
+
+def _page(rows, sort_field, limit):
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    last_id = last["_id"] if isinstance(last, dict) else last.id
+    if sort_field == "_id":
+        return rows, encode_cursor([last_id])
+    return rows, encode_cursor([_sort_value(last, sort_field), last_id])
@@ -1,8 +1,8 @@
 from pathlib import Path
 import os
 from dotenv import load_dotenv
-from mongoengine import connect
-import certifi
+from corsheaders.defaults import default_headers
+from backend.mongo import connect_mongo
 
 # Load .env
 load_dotenv()
@@ -14,12 +14,30 @@ DEBUG = os.getenv("DJANGO_DEBUG") == "True"
 
 ALLOWED_HOSTS = ["campify-backend.onrender.com", "localhost"]
 
+# Set by backend/asgi.py: the /api/async/ views are only served under ASGI
+SERVE_ASYNC_API = os.getenv("SERVE_ASYNC_API") == "True"
+
+def env_int(name, default=None):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
 # MONGO ENGINE CONFIG
+# The connection is lazy: nothing is opened until the first query (backend/mongo.py)
 MONGO_URI = os.getenv("MONGO_URI")
-connect(
-    host=MONGO_URI,
-    tlsCAFile=certifi.where()
-)
+MONGO = {
+    "URI": MONGO_URI,
+    "MAX_POOL_SIZE": env_int("MONGO_MAX_POOL_SIZE", 50),
+    "MIN_POOL_SIZE": env_int("MONGO_MIN_POOL_SIZE", 0),
+    "MAX_IDLE_TIME_MS": env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+    "WAIT_QUEUE_TIMEOUT_MS": env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000),  # waiting for a free pooled connection
+    "SERVER_SELECTION_TIMEOUT_MS": env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+    "CONNECT_TIMEOUT_MS": env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+    "SOCKET_TIMEOUT_MS": env_int("MONGO_SOCKET_TIMEOUT_MS", 30000),
+    "READ_PREFERENCE": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+    "COMPRESSORS": os.getenv("MONGO_COMPRESSORS", "zstd,snappy"),  # only the installed ones are used
+}
+connect_mongo(MONGO)
 
 INSTALLED_APPS = [
     "django.contrib.admin",
@@ -35,6 +53,7 @@ INSTALLED_APPS = [
     "users",
     "products",
     "orders",
+    "stats",
 ]
 
 MIDDLEWARE = [
@@ -80,8 +99,41 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 ADMIN_FRONTEND_URL = os.getenv("ADMIN_FRONTEND_URL")
 CLIENT_FRONTEND_URL = os.getenv("CLIENT_FRONTEND_URL")
 
+# PASSWORD HASHING (users/passwords.py)
+PASSWORD_HASHING = {
+    "WORKERS": int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)),
+    "MAX_QUEUE": int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32)),
+    "ROUNDS": int(os.getenv("PASSWORD_HASH_ROUNDS", 12)),
+}
+
+# CACHES
+# A shared backend (Redis) is only configured when REDIS_URL is set
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+if os.getenv("REDIS_URL"):
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("REDIS_URL"),
+    }
+
+# Product catalog cache (products/cache.py)
+PRODUCT_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", 1024)),
+    "TTL": int(os.getenv("PRODUCT_CACHE_TTL", 60)),  # seconds
+    "SHARED_BACKEND": "shared" if "shared" in CACHES else None,
+}
+
+# JWT (users/authentication.py)
+JWT_AUTH = {
+    "SECRET": os.getenv("JWT_SECRET"),  # defaults to SECRET_KEY
+    "LIFETIME_HOURS": int(os.getenv("JWT_LIFETIME_HOURS", 24)),
+}
+
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "users.authentication.JWTAuthentication",
+    ],
     "DEFAULT_PERMISSION_CLASSES": [],
 }
 
@@ -90,6 +142,8 @@ CORS_ALLOWED_ORIGINS = [
     os.getenv("ADMIN_FRONTEND_URL"),
     os.getenv("CLIENT_FRONTEND_URL"),
 ]
+# X-Product-Version carries the edited version on product updates
+CORS_ALLOW_HEADERS = (*default_headers, "x-product-version")
 
 # STATIC FILES
 STATIC_URL = "/static/"
@@ -2,11 +2,17 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from .health import health_db
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('health/db', health_db),
     path('api/users/', include('users.urls')),
     path('api/products/', include('products.urls')),  # include the products app URLs
     path('api/orders/', include('orders.urls')), 
     path('api/stats/', include('stats.urls')), 
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.SERVE_ASYNC_API:
+    # ASGI read path. Under WSGI every request would run on a new event loop with its own Mongo client
+    urlpatterns.append(path('api/async/', include('backend.async_urls')))
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Small HTTP load test to compare the WSGI and ASGI read paths.
+
+Run the same code base under both servers, e.g.
+
+    gunicorn backend.wsgi --workers 4 --threads 8 -b 127.0.0.1:8000
+    uvicorn backend.asgi:application --workers 4 --port 8001
+
+then point one --target at each (the ASGI views live under /api/async/):
+
+    python loadtest.py \
+        --target wsgi=http://127.0.0.1:8000/api \
+        --target asgi=http://127.0.0.1:8001/api/async \
+        --path /products/ --path /stats/dashboard/ \
+        --concurrency 64 --duration 20
+
+Prints requests per second, p50 / p99 latency and errors per target and path.
+Needs only the standard library.
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(url, concurrency, duration, headers):
+    """
+    Hammers url from `concurrency` threads (one keep-alive connection each)
+    for `duration` seconds. Returns (latencies in ms, errors, elapsed seconds).
+    """
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        connection = connection_class(parts.netloc, timeout=30)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request("GET", target, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = connection_class(parts.netloc, timeout=30)
+                continue
+            local.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), errors[0], time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", required=True,
+                        help="name=base_url, e.g. asgi=http://127.0.0.1:8001/api/async (repeatable)")
+    parser.add_argument("--path", action="append", default=None,
+                        help="path below each base URL (repeatable, default /products/)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per target and path")
+    parser.add_argument("--token", help="JWT sent as Authorization: Bearer <token>")
+    args = parser.parse_args()
+
+    headers = {"Accept": "application/json"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+
+    print(f"{'target':<10} {'path':<30} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for path in args.path or ["/products/"]:
+        for target in args.target:
+            name, _, base_url = target.partition("=")
+            latencies, errors, elapsed = run(base_url.rstrip("/") + path, args.concurrency, args.duration, headers)
+            print(
+                f"{name:<10} {path:<30} {len(latencies) / elapsed:>9.1f} "
+                f"{percentile(latencies, 50):>9.1f} {percentile(latencies, 99):>9.1f} {errors:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
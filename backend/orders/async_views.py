@@ -0,0 +1,95 @@
+"""
+Async versions of the order lists, for the ASGI read path (backend/async_urls.py).
+Same params and JSON as AllOrdersView / UserOrdersView.
+"""
+import asyncio
+
+from bson import ObjectId
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from backend.mongo_async import async_collection
+from backend.pagination import InvalidCursor, apaginate, parse_limit
+from users.authentication import async_authenticated
+from users.models import User
+from .models import Order
+from .serializers import serialize_order
+from .views import filter_orders
+
+
+async def fetch_order_users(raw_orders):
+    """
+    Async fetch_order_users(): the users of raw orders in a single $in query.
+    """
+    user_ids = {o["user"] for o in raw_orders if o.get("user")}
+    if not user_ids:
+        return {}
+    users = await async_collection(User).find(
+        {"_id": {"$in": list(user_ids)}}, {"full_name": 1, "email": 1}
+    ).to_list()
+    return {
+        u["_id"]: {"id": str(u["_id"]), "name": u.get("full_name"), "email": u.get("email")}
+        for u in users
+    }
+
+
+async def list_orders(request, base_query, include_user):
+    """
+    Async list_orders(): the full list, or one keyset page (with its total
+    counted concurrently).
+    """
+    params = request.GET
+    try:
+        query = {**base_query, **filter_orders(Order.objects(), params, allow_user=include_user)._query}
+        paginated = "limit" in params or "cursor" in params
+        limit = parse_limit(params.get("limit")) if paginated else None
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    collection = async_collection(Order)
+    if not paginated:
+        orders = await collection.find(query).sort("date", -1).to_list()
+        users = await fetch_order_users(orders) if include_user else None
+        return JsonResponse([serialize_order(o, users) for o in orders], safe=False)
+
+    count = params.get("count", "true").lower() not in ("0", "false", "no")
+    try:
+        (page, next_cursor), total = await asyncio.gather(
+            apaginate(collection, query, "date", True, limit, params.get("cursor")),
+            collection.count_documents(query) if count else asyncio.sleep(0),
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    users = await fetch_order_users(page) if include_user else None
+    data = {
+        "results": [serialize_order(o, users) for o in page],
+        "next_cursor": next_cursor,
+    }
+    if count:
+        data["total"] = total
+    return JsonResponse(data)
+
+
+@require_GET
+@async_authenticated
+async def all_orders(request):
+    """
+    GET /api/async/orders/
+    """
+    return await list_orders(request, {}, include_user=True)
+
+
+@require_GET
+@async_authenticated
+async def user_orders(request, user_id):
+    """
+    GET /api/async/orders/<user_id>/
+    """
+    if not ObjectId.is_valid(user_id):
+        return JsonResponse({"error": "User not found"}, status=404)
+    if getattr(request.user, "id", None) != user_id:
+        # The token proves the user exists only when it is theirs
+        if not await async_collection(User).find_one({"_id": ObjectId(user_id)}, {"_id": 1}):
+            return JsonResponse({"error": "User not found"}, status=404)
+    return await list_orders(request, {"user": ObjectId(user_id)}, include_user=False)
@@ -0,0 +1,164 @@
+"""
+Checkout: reserve stock and create the order in a constant number of round trips.
+
+Stock is taken with one unordered bulk_write of conditional $inc updates
+({"stock": {"$gte": qty}}), so two checkouts can never both take the last unit.
+
+When the deployment supports transactions (replica set / sharded cluster),
+reservation, order insert and cart cleanup run in one transaction. Otherwise
+each reserved product is tagged with a reservation token so a partial
+reservation can be rolled back precisely.
+"""
+import uuid
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import ConfigurationError, OperationFailure
+
+from products.cache import invalidate_products
+from products.models import Product
+from users.models import User
+from .models import Order
+
+# Set to False the first time the server refuses a transaction
+_transactions_supported = None
+
+
+class OutOfStock(Exception):
+    def __init__(self, shortages):
+        super().__init__("Not enough stock")
+        self.shortages = shortages  # [{"product_id", "name", "requested", "available"}]
+
+
+def _quantities(items):
+    quantities = {}
+    for item in items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + int(item.quantity)
+    return quantities
+
+
+def _shortages(quantities, session=None):
+    products = Product._get_collection().find(
+        {"_id": {"$in": [ObjectId(pid) for pid in quantities]}},
+        {"name": 1, "stock": 1},
+        session=session,
+    )
+    available = {str(p["_id"]): p for p in products}
+    shortages = []
+    for pid, qty in quantities.items():
+        product = available.get(pid, {})
+        stock = product.get("stock", 0)
+        if stock < qty:
+            shortages.append({"product_id": pid, "name": product.get("name"), "requested": qty, "available": stock})
+    return shortages
+
+
+def reserve_stock(quantities, session=None):
+    """
+    Takes quantities {product_id: qty} out of stock, all or nothing.
+    Without a session, returns the reservation token to confirm or release.
+    Raises OutOfStock (after undoing any partial reservation).
+    """
+    if any(not ObjectId.is_valid(pid) for pid in quantities):
+        raise OutOfStock([{"product_id": pid, "name": None, "requested": qty, "available": 0}
+                          for pid, qty in quantities.items() if not ObjectId.is_valid(pid)])
+
+    token = None if session else uuid.uuid4().hex
+    ops = []
+    for pid, qty in quantities.items():
+        update = {"$inc": {"stock": -qty}}
+        if token:
+            update["$push"] = {"reservations": token}
+        ops.append(UpdateOne({"_id": ObjectId(pid), "stock": {"$gte": qty}}, update))
+
+    result = Product._get_collection().bulk_write(ops, ordered=False, session=session)
+    if result.modified_count == len(ops):
+        return token
+
+    if token:
+        release_stock(quantities, token)
+    raise OutOfStock(_shortages(quantities, session))
+
+
+def release_stock(quantities, token):
+    """
+    Gives back the stock of the products that carry this reservation token.
+    """
+    Product._get_collection().bulk_write([
+        UpdateOne(
+            {"_id": ObjectId(pid), "reservations": token},
+            {"$inc": {"stock": qty}, "$pull": {"reservations": token}},
+        )
+        for pid, qty in quantities.items()
+    ], ordered=False)
+
+
+def confirm_stock(quantities, token):
+    Product._get_collection().update_many(
+        {"_id": {"$in": [ObjectId(pid) for pid in quantities]}, "reservations": token},
+        {"$pull": {"reservations": token}},
+    )
+
+
+def _clear_ordered_items(user_id, quantities, session=None):
+    # Only remove what was ordered; items added meanwhile stay in the cart
+    User._get_collection().update_one(
+        {"_id": ObjectId(user_id)},
+        {"$pull": {"cartData": {"product_id": {"$in": list(quantities)}}}},
+        session=session,
+    )
+
+
+def _place_in_transaction(order, quantities):
+    def write(session):
+        reserve_stock(quantities, session=session)
+        Order._get_collection().insert_one(order.to_mongo(), session=session)
+        _clear_ordered_items(order.user.id, quantities, session=session)
+
+    client = Order._get_collection().database.client
+    with client.start_session() as session:
+        # Retries the whole transaction on TransientTransactionError (e.g. a
+        # WriteConflict with a concurrent checkout of the same product)
+        session.with_transaction(write)
+
+
+def _place_with_reservation(order, quantities):
+    token = reserve_stock(quantities)
+    try:
+        Order._get_collection().insert_one(order.to_mongo())
+        _clear_ordered_items(order.user.id, quantities)
+    except Exception:
+        release_stock(quantities, token)
+        raise
+    confirm_stock(quantities, token)
+
+
+def place_order(order):
+    """
+    Reserves stock for order.items, inserts the order and removes the ordered
+    items from the user's cart. Raises OutOfStock if any product is short.
+    """
+    global _transactions_supported
+    order.validate()
+    if order.id is None:
+        order.id = ObjectId()
+    quantities = _quantities(order.items)
+
+    placed = False
+    if _transactions_supported is not False:
+        try:
+            _place_in_transaction(order, quantities)
+            placed = True
+            _transactions_supported = True
+        except (OperationFailure, ConfigurationError) as e:
+            # Standalone servers reject transactions (IllegalOperation); anything else is a real error
+            if isinstance(e, OperationFailure) and e.code != 20:
+                raise
+            _transactions_supported = False
+
+    if not placed:
+        _place_with_reservation(order, quantities)
+
+    # Only stock changed: drop the cached copies of these products, keep the list pages and ETags
+    invalidate_products(quantities.keys(), stock_only=True)
+    return order
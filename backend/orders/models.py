@@ -30,3 +30,14 @@ class Order(Document):
     )
     payment = BooleanField(default=False)
     date = DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        # Indexes are built by `manage.py ensure_indexes`, not on first use
+        "auto_create_index": False,
+        # Back the order lists (AllOrdersView / UserOrdersView) so they never collection-scan
+        "indexes": [
+            "-date",
+            ("user", "-date"),
+            ("status", "date"),
+        ]
+    }
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from users.models import User
 from .models import Order, OrderItem
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -12,4 +13,76 @@ class OrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['id', 'user', 'items', 'total', 'status', 'created_at']
-        read_only_fields = ['user', 'created_at', 'status']
\ No newline at end of file
+        read_only_fields = ['user', 'created_at', 'status']
+
+
+DELETED_USER = {
+    "id": None,
+    "name": "Deleted User",
+    "email": None,
+}
+
+
+def fetch_order_users(raw_orders):
+    """
+    Loads the users referenced by raw orders in a single $in query.
+    Returns {user ObjectId: {"id", "name", "email"}}.
+    """
+    user_ids = {o["user"] for o in raw_orders if o.get("user")}
+    if not user_ids:
+        return {}
+
+    users = User.objects(id__in=list(user_ids)).only("full_name", "email").as_pymongo()
+    return {
+        u["_id"]: {"id": str(u["_id"]), "name": u.get("full_name"), "email": u.get("email")}
+        for u in users
+    }
+
+
+def serialize_order(raw, users=None):
+    """
+    Converts a raw order document (as_pymongo) to the API dict.
+    If users (from fetch_order_users) is given, a "user" entry is included;
+    orders whose user no longer exists get DELETED_USER.
+    """
+    address = raw.get("address") or {}
+    data = {
+        "_id": str(raw["_id"]),
+        "items": [
+            {
+                "product_id": item.get("product_id"),
+                "name": item.get("name"),
+                "price": float(item.get("price", 0)),
+                "quantity": float(item.get("quantity", 0)),
+            }
+            for item in raw.get("items", [])
+        ],
+        "amount": float(raw.get("amount", 0)),
+        "address": {
+            "first_name": address.get("first_name"),
+            "last_name": address.get("last_name"),
+            "email": address.get("email"),
+            "address": address.get("address"),
+            "city": address.get("city"),
+            "zip": address.get("zip"),
+        },
+        "status": raw.get("status", "pending"),
+        "payment": raw.get("payment", False),
+        "date": raw["date"].isoformat(),
+    }
+    if users is not None:
+        data = {"_id": data["_id"], "user": users.get(raw.get("user"), DELETED_USER), **data}
+    return data
+
+
+def serialize_orders(queryset, include_user=True):
+    """
+    Serializes an Order queryset straight from raw SON, without building
+    MongoEngine documents. Referenced users cost one query for the whole list.
+    """
+    return serialize_raw_orders(list(queryset.as_pymongo()), include_user)
+
+
+def serialize_raw_orders(raw_orders, include_user=True):
+    users = fetch_order_users(raw_orders) if include_user else None
+    return [serialize_order(raw, users) for raw in raw_orders]
@@ -0,0 +1,110 @@
+import os
+import threading
+import unittest
+
+import mongoengine
+from django.test import SimpleTestCase
+from mongoengine.connection import get_db
+from rest_framework.test import APIClient
+
+from backend import conditional
+from products import cache as product_cache
+from products.models import Product
+from users.cart_service import add_to_cart
+from users.models import User
+from . import checkout
+from .models import Order
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+# Set to run against a real server (a replica set exercises the transaction path)
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+ADDRESS = {"first_name": "Ada", "last_name": "L", "email": "ada@example.com",
+           "address": "1 Camp Road", "city": "Tunis", "zip": "1000"}
+
+
+@unittest.skipUnless(MONGO_TEST_URI or mongomock, "needs MONGO_TEST_URI or mongomock")
+class CheckoutConcurrencyTest(SimpleTestCase):
+    THREADS = 25
+    STOCK = 10
+
+    def setUp(self):
+        mongoengine.disconnect()
+        if MONGO_TEST_URI:
+            mongoengine.connect(host=MONGO_TEST_URI)
+        else:
+            mongoengine.connect("test", mongo_client_class=mongomock.MongoClient)
+            _patch_mongomock_bulk_sort()
+        self.addCleanup(self._drop)
+        product_cache._cache = None
+        conditional._versions.clear()
+        # mongomock has no sessions: exercise the reservation path there
+        checkout._transactions_supported = None if MONGO_TEST_URI else False
+
+    def _drop(self):
+        db = get_db()
+        db.client.drop_database(db.name)
+        mongoengine.disconnect()
+
+    def test_last_units_are_sold_once(self):
+        product = Product(name="Hot tent", price=100, category="Tents", stock=self.STOCK).save()
+        users = [User(full_name=f"User {i}", email=f"user{i}@example.com", password="x").save()
+                 for i in range(self.THREADS)]
+        for user in users:
+            add_to_cart(str(user.id), str(product.id))
+
+        catalog_version = conditional.get_version("products")[0]
+        statuses = []
+        start = threading.Barrier(self.THREADS)
+
+        def buy(user):
+            start.wait()
+            response = APIClient().post(f"/api/orders/checkout/{user.id}/", {"address": ADDRESS}, format="json")
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.reload()
+        self.assertEqual(statuses.count(201), self.STOCK)
+        self.assertEqual(statuses.count(409), self.THREADS - self.STOCK)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(product.reservations, [])
+        self.assertEqual(Order.objects.count(), self.STOCK)
+        # Stock-only writes leave the catalog ETags (and cached list pages) alone
+        conditional._versions.clear()
+        self.assertEqual(conditional.get_version("products")[0], catalog_version)
+
+    def test_non_positive_quantity_is_rejected(self):
+        product = Product(name="Lamp", price=20, category="Lighting", stock=5).save()
+        user = User(full_name="User", email="user@example.com", password="x").save()
+        add_to_cart(str(user.id), str(product.id))
+        User._get_collection().update_one({"_id": user.id}, {"$set": {"cartData.0.quantity": -3}})
+
+        response = APIClient().post(f"/api/orders/checkout/{user.id}/", {"address": ADDRESS}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        product.reload()
+        self.assertEqual(product.stock, 5)
+        self.assertEqual(Order.objects.count(), 0)
+
+
+def _patch_mongomock_bulk_sort():
+    # PyMongo >= 4.11 passes sort= to the bulk builder, which mongomock 4.x does not accept
+    builder = mongomock.collection.BulkOperationBuilder
+    if getattr(builder.add_update, "accepts_sort", False):
+        return
+    add_update = builder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    add_update_without_sort.accepts_sort = True
+    builder.add_update = add_update_without_sort
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import CheckoutView, UserOrdersView, AllOrdersView, DeleteOrderView, GetOrderByIdView
+from .views import CheckoutView, UserOrdersView, AllOrdersView, DeleteOrderView, GetOrderByIdView, ExportOrdersView
 
 urlpatterns = [
     path('checkout/<str:user_id>/', CheckoutView.as_view(), name='checkout'),
+    path('export/', ExportOrdersView.as_view(), name='export-orders'),  # before <user_id>/
     path('<str:order_id>/delete/', DeleteOrderView.as_view(), name='delete-order'),
     path('<str:user_id>/', UserOrdersView.as_view(), name='user-orders'),
     path('order/<str:order_id>/', GetOrderByIdView.as_view(), name='get-order-by-id'),
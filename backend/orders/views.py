@@ -1,16 +1,26 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from django.http import StreamingHttpResponse
 from decimal import Decimal
+import csv
+import json
+from datetime import datetime, timedelta
+from bson import ObjectId
 from users.models import User
 from .models import Order, OrderItem, Address
+from .serializers import serialize_orders, serialize_raw_orders
+from backend.pagination import InvalidCursor, paginate, parse_limit
+from backend.conditional import bump_version, conditional_response
+from stats.rollup import record_order
+from .checkout import place_order, OutOfStock
 
 
 class CheckoutView(APIView):
     def post(self, request, user_id, *args, **kwargs):
-        # 1. Fetch user
+        # 1. Fetch user (only the cart is needed)
         try:
-            user = User.objects.get(id=user_id)
+            user = User.objects.only("cartData").get(id=user_id)
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -18,10 +28,16 @@ class CheckoutView(APIView):
         if not user.cartData or len(user.cartData) == 0:
             return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 3. Calculate total amount
+        # 3. Reject non-positive quantities: they would put stock back and lower the amount
+        invalid = [item.product_id for item in user.cartData if int(item.quantity) < 1]
+        if invalid:
+            return Response({"error": "Quantities must be at least 1", "products": invalid},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # 4. Calculate total amount
         total = sum(Decimal(item['price']) * Decimal(item['quantity']) for item in user.cartData)
 
-        # 4. Create OrderItem objects
+        # 5. Create OrderItem objects
         order_items = [
             OrderItem(
                 product_id=item.product_id,
@@ -31,15 +47,15 @@ class CheckoutView(APIView):
             ) for item in user.cartData
         ]
 
-        # 5. Create Address object
+        # 6. Create Address object
         address_data = request.data.get('address')
         if not address_data:
             return Response({"error": "Address data is required"}, status=status.HTTP_400_BAD_REQUEST)
 
         order_address = Address(**address_data)
 
-        # 6. Create Order
-        order = Order.objects.create(
+        # 7. Reserve stock, create the order and clear the ordered items from the cart
+        order = Order(
             user=user,  # ReferenceField expects the User object, not an id
             items=order_items,
             amount=total,
@@ -47,111 +63,201 @@ class CheckoutView(APIView):
             status='paid',
             payment=True
         )
-
-        # 7. Clear user's cart
-        user.cartData = []
-        user.save()
+        try:
+            place_order(order)
+        except OutOfStock as e:
+            return Response({"error": "Not enough stock", "products": e.shortages}, status=status.HTTP_409_CONFLICT)
+        record_order(order)
+        bump_version("orders")
 
         return Response({"message": "Order created", "order_id": str(order.id)}, status=status.HTTP_201_CREATED)
 
 
 class UserOrdersView(APIView):
+    """
+    GET /api/orders/<user_id>/
+    Orders of one user, newest first. Accepts the same params as AllOrdersView (except user).
+    """
     def get(self, request, user_id):
         try:
-            user = User.objects.get(id=user_id)
-            orders = Order.objects(user=user).order_by('-date')
-
-            orders_list = []
-            for order in orders:
-                orders_list.append({
-                    "_id": str(order.id),
-                    "items": [
-                        {
-                            "product_id": item.product_id,
-                            "name": item.name,
-                            "price": float(item.price),
-                            "quantity": float(item.quantity),
-                        }
-                        for item in order.items
-                    ],
-                    "amount": float(order.amount),
-                    "address": {
-                        "first_name": order.address.first_name,
-                        "last_name": order.address.last_name,
-                        "email": order.address.email,
-                        "address": order.address.address,
-                        "city": order.address.city,
-                        "zip": order.address.zip,
-                    },
-                    "status": order.status,
-                    "payment": order.payment,
-                    "date": order.date.isoformat(),
-                })
-
-            return Response(orders_list, status=status.HTTP_200_OK)
+            if getattr(request.user, "id", None) == user_id:
+                # The token already proves this user exists
+                user = ObjectId(user_id)
+            else:
+                user = User.objects.only("id").get(id=user_id)
+            return list_orders(request, Order.objects(user=user), include_user=False)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class AllOrdersView(APIView):
+    """
+    GET /api/orders/
+    All orders, newest first.
+
+    Optional query params:
+      status=paid,shipped       only these statuses
+      date_from / date_to       ISO dates, inclusive range on the order date
+      user=<user_id>            only this user's orders
+      limit / cursor            keyset pagination on (date, _id); the response becomes
+                                {"results": [...], "next_cursor": "...", "total": N}
+      count=false               skip the total count of a paginated response
+    """
     def get(self, request):
         try:
-            orders = Order.objects().order_by('-date')
-
-            result = []
-            for order in orders:
-
-                # safely handle missing user reference
-                try:
-                    user_data = {
-                        "id": str(order.user.id),
-                        "name": order.user.full_name,
-                        "email": order.user.email,
-                    }
-                except Exception:
-                    user_data = {
-                        "id": None,
-                        "name": "Deleted User",
-                        "email": None,
-                    }
-
-                result.append({
-                    "_id": str(order.id),
-                    "user": user_data,
-                    "items": [
-                        {
-                            "product_id": item.product_id,
-                            "name": item.name,
-                            "price": float(item.price),
-                            "quantity": float(item.quantity),
-                        }
-                        for item in order.items
-                    ],
-                    "amount": float(order.amount),
-                    "address": {
-                        "first_name": order.address.first_name,
-                        "last_name": order.address.last_name,
-                        "email": order.address.email,
-                        "address": order.address.address,
-                        "city": order.address.city,
-                        "zip": order.address.zip,
-                    },
-                    "status": order.status,
-                    "payment": order.payment,
-                    "date": order.date.isoformat(),
-                })
-
-            return Response(result, status=status.HTTP_200_OK)
+            # users are fetched in one query; missing ones become "Deleted User"
+            return list_orders(request, Order.objects(), include_user=True)
 
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def parse_date_param(value, end_of_day=False):
+    """
+    Parses 2025-01-31 or 2025-01-31T10:00:00. A bare date used as an upper bound covers the whole day.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1) - timedelta(microseconds=1)
+    return parsed
+
+
+def filter_orders(orders, params, allow_user=True):
+    """
+    Pushes the status / date range / user filters of a request down to Mongo.
+    """
+    if params.get("status"):
+        orders = orders.filter(status__in=[s.strip() for s in params["status"].split(",") if s.strip()])
+    if params.get("date_from"):
+        orders = orders.filter(date__gte=parse_date_param(params["date_from"]))
+    if params.get("date_to"):
+        orders = orders.filter(date__lte=parse_date_param(params["date_to"], end_of_day=True))
+    if allow_user and params.get("user"):
+        if not ObjectId.is_valid(params["user"]):
+            raise ValueError("Invalid user id")
+        orders = orders.filter(user=ObjectId(params["user"]))
+    return orders
+
+
+def list_orders(request, orders, include_user):
+    """
+    Shared GET handler of the order lists: filters, then either the full list
+    (no limit/cursor given, as before) or one keyset page.
+    """
+    params = request.query_params
+    try:
+        orders = filter_orders(orders, params, allow_user=include_user)
+        paginated = "limit" in params or "cursor" in params
+        limit = parse_limit(params.get("limit")) if paginated else None
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not paginated:
+        return Response(serialize_orders(orders.order_by('-date'), include_user), status=status.HTTP_200_OK)
+
+    try:
+        page, next_cursor = paginate(orders.as_pymongo(), "date", True, limit, params.get("cursor"))
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = {
+        "results": serialize_raw_orders(page, include_user),
+        "next_cursor": next_cursor,
+    }
+    if params.get("count", "true").lower() not in ("0", "false", "no"):
+        data["total"] = orders.count()
+    return Response(data, status=status.HTTP_200_OK)
+
+
+class Echo:
+    """
+    File-like object whose write() just returns the value, so csv.writer can feed a generator.
+    """
+    def write(self, value):
+        return value
+
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = ("user", "items", "amount", "address", "status", "payment", "date")
+CSV_COLUMNS = [
+    "order_id", "date", "user_id", "user_name", "user_email", "status", "payment", "amount",
+    "items_count", "items", "first_name", "last_name", "email", "address", "city", "zip",
+]
+
+
+def iter_order_batches(orders):
+    """
+    Yields the serialized orders in batches of EXPORT_BATCH_SIZE, reading a single
+    projected Mongo cursor and resolving the users of each batch with one query.
+    """
+    cursor = orders.order_by("date").only(*EXPORT_FIELDS).no_cache().as_pymongo().batch_size(EXPORT_BATCH_SIZE)
+    batch = []
+    for raw in cursor:
+        batch.append(raw)
+        if len(batch) == EXPORT_BATCH_SIZE:
+            yield serialize_raw_orders(batch)
+            batch = []
+    if batch:
+        yield serialize_raw_orders(batch)
+
+
+def csv_rows(orders):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for batch in iter_order_batches(orders):
+        for o in batch:
+            address = o["address"]
+            yield writer.writerow([
+                o["_id"], o["date"], o["user"]["id"] or "", o["user"]["name"], o["user"]["email"] or "",
+                o["status"], o["payment"], f'{o["amount"]:.2f}',
+                len(o["items"]), "; ".join(f'{i["name"]} x{int(i["quantity"])}' for i in o["items"]),
+                address["first_name"], address["last_name"], address["email"],
+                address["address"], address["city"], address["zip"],
+            ])
+
+
+def ndjson_rows(orders):
+    for batch in iter_order_batches(orders):
+        for o in batch:
+            yield json.dumps(o) + "\n"
+
+
+class ExportOrdersView(APIView):
+    """
+    GET /api/orders/export/?type=csv|ndjson
+    Streams every order (oldest first) as CSV (default) or NDJSON.
+    Accepts the status / date_from / date_to / user filters of AllOrdersView,
+    so exports can be done incrementally by date range.
+    Memory stays constant: rows are written as the Mongo cursor is read.
+    """
+    def get(self, request):
+        export_type = request.query_params.get("type", "csv").lower()
+        if export_type not in ("csv", "ndjson"):
+            return Response({"error": "type must be csv or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            orders = filter_orders(Order.objects(), request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if export_type == "csv":
+            response = StreamingHttpResponse(csv_rows(orders), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(ndjson_rows(orders), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="orders.{export_type}"'
+        return response
+
+
 class DeleteOrderView(APIView):
     def delete(self, request, order_id):
         try:
             order = Order.objects.get(id=order_id)
             order.delete()
+            record_order(order, sign=-1)
+            bump_version("orders")
             return Response({"message": "Order deleted successfully"}, status=status.HTTP_200_OK)
         except Order.DoesNotExist:
             return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -160,55 +266,22 @@ class DeleteOrderView(APIView):
 
 
 class GetOrderByIdView(APIView):
+    """
+    GET /api/orders/order/<order_id>/
+    Supports If-None-Match / If-Modified-Since (see backend/conditional.py).
+    """
     def get(self, request, order_id):
-        try:
+        def build():
             # Fetch order
-            try:
-                order = Order.objects.get(id=order_id)
-            except Order.DoesNotExist:
+            orders = serialize_orders(Order.objects(id=order_id))
+            if not orders:
                 return Response({"error": "Order not found"}, status=status.HTTP_404_NOT_FOUND)
 
-            # Handle missing user reference
-            try:
-                user_data = {
-                    "id": str(order.user.id),
-                    "name": order.user.full_name,
-                    "email": order.user.email,
-                }
-            except Exception:
-                user_data = {
-                    "id": None,
-                    "name": "Deleted User",
-                    "email": None,
-                }
-
-            order_data = {
-                "_id": str(order.id),
-                "user": user_data,
-                "items": [
-                    {
-                        "product_id": item.product_id,
-                        "name": item.name,
-                        "price": float(item.price),
-                        "quantity": float(item.quantity),
-                    }
-                    for item in order.items
-                ],
-                "amount": float(order.amount),
-                "address": {
-                    "first_name": order.address.first_name,
-                    "last_name": order.address.last_name,
-                    "email": order.address.email,
-                    "address": order.address.address,
-                    "city": order.address.city,
-                    "zip": order.address.zip,
-                },
-                "status": order.status,
-                "payment": order.payment,
-                "date": order.date.isoformat(),
-            }
-
-            return Response(order_data, status=status.HTTP_200_OK)
+            return Response(orders[0], status=status.HTTP_200_OK)
+
+        try:
+            # Orders are per-user data: only the browser may keep them, and must revalidate
+            return conditional_response(request, "orders", build, "private, no-cache", vary="Accept, Authorization")
 
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,80 @@
+"""
+Async versions of the catalog reads, for the ASGI read path (backend/async_urls.py).
+They accept the same params and return the same JSON as ProductListView /
+ProductDetailView, but query Mongo through the async driver instead of the
+product cache.
+"""
+from bson import ObjectId
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from backend.mongo_async import async_collection
+from backend.pagination import InvalidCursor, apaginate, parse_limit
+from users.authentication import async_authenticated
+from .models import Product
+from .serializers import serialize_product
+from .views import filter_products, parse_product_fields, parse_product_sort
+
+
+async def fetch_products(product_ids):
+    """
+    Async get_products(): {product_id: serialized product}, in one $in query.
+    """
+    ids = list(dict.fromkeys(str(pid) for pid in product_ids if ObjectId.is_valid(str(pid))))
+    if not ids:
+        return {}
+    docs = await async_collection(Product).find({"_id": {"$in": [ObjectId(pid) for pid in ids]}}).to_list()
+    return {str(doc["_id"]): serialize_product(Product._from_son(doc)) for doc in docs}
+
+
+@require_GET
+@async_authenticated
+async def product_list(request):
+    """
+    GET /api/async/products/
+    """
+    params = request.GET
+    try:
+        # The filters are compiled by MongoEngine, then run on the async driver
+        query = filter_products(Product.objects(), params)._query
+        fields = parse_product_fields(params.get("fields"))
+        sort_field, descending = parse_product_sort(params.get("sort"))
+        paginated = "limit" in params or "cursor" in params
+        limit = parse_limit(params.get("limit")) if paginated else None
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    projection = None
+    if fields:
+        projection = {field: 1 for field in fields} | ({sort_field: 1} if sort_field != "_id" else {})
+
+    collection = async_collection(Product)
+    if not paginated:
+        cursor = collection.find(query, projection)
+        if sort_field != "_id":
+            cursor = cursor.sort([(sort_field, -1 if descending else 1), ("_id", 1)])
+        docs = await cursor.to_list()
+        return JsonResponse([serialize_product(Product._from_son(doc), fields) for doc in docs], safe=False)
+
+    try:
+        page, next_cursor = await apaginate(
+            collection, query, sort_field, descending, limit, params.get("cursor"), projection
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({
+        "results": [serialize_product(Product._from_son(doc), fields) for doc in page],
+        "next_cursor": next_cursor,
+    })
+
+
+@require_GET
+@async_authenticated
+async def product_detail(request, product_id):
+    """
+    GET /api/async/products/<product_id>
+    """
+    product = (await fetch_products([product_id])).get(product_id)
+    if product is None:
+        return JsonResponse({"error": "Product not found"}, status=404)
+    return JsonResponse(product)
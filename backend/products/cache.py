@@ -0,0 +1,212 @@
+"""
+Product catalog cache.
+
+Two tiers:
+  - a bounded per-process LRU with a TTL (always on)
+  - an optional shared Django cache backend (settings.PRODUCT_CACHE["SHARED_BACKEND"])
+
+Single products are cached by id as serialized dicts, and a write drops
+exactly the products it touched. List responses are cached under the
+"products" version of backend/conditional.py (the catalog ETag), which
+catalog writes bump, so a write never has to know which list pages contained
+the product. A process sees another one's bump within conditional.VERSION_TTL
+and then drops its local tier, so a body is never served under an ETag newer
+than its data.
+
+Checkouts only change stock: they drop the ordered products but leave the
+version, the list pages and the ETags alone, so flash sales do not flush the
+catalog. Stock shown by cached list pages (and by other processes' local
+entries) catches up within TTL seconds; checkout itself is authoritative.
+"""
+import threading
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.cache import caches
+
+from backend.conditional import bump_version, get_version
+from backend.lru import LRUCache
+from .models import Product
+from .serializers import serialize_product
+
+DEFAULTS = {
+    "MAX_ENTRIES": 1024,
+    "TTL": 60,
+    "SHARED_BACKEND": None,
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "PRODUCT_CACHE", {})}
+
+
+class ProductCache:
+    def __init__(self, max_entries, ttl, shared_backend=None):
+        self.local = LRUCache(max_entries, ttl)
+        self.ttl = ttl
+        self.shared_backend = shared_backend
+        self._lock = threading.Lock()
+        self._version = None
+        self.counters = {"hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0}
+
+    @property
+    def shared(self):
+        return caches[self.shared_backend] if self.shared_backend else None
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    # ---- Generic two-tier lookups ----
+    def get_many(self, keys):
+        """
+        Returns {key: value} for the keys found in either tier.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        self._count("hits", len(found))
+
+        if missing and self.shared is not None:
+            shared_found = self.shared.get_many(missing)
+            for key, value in shared_found.items():
+                self.local.set(key, value)
+            found.update(shared_found)
+            self._count("shared_hits", len(shared_found))
+
+        self._count("misses", len(keys) - len(found))
+        return found
+
+    def set_many(self, values):
+        for key, value in values.items():
+            self.local.set(key, value)
+        if values and self.shared is not None:
+            self.shared.set_many(values, timeout=self.ttl)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.local.delete(key)
+        if keys and self.shared is not None:
+            self.shared.delete_many(keys)
+
+    # ---- Catalog version ----
+    def version(self):
+        """
+        The current "products" version; entries cached under an older one are dropped.
+        """
+        version = get_version("products")[0]
+        with self._lock:
+            changed = version != self._version
+            self._version = version
+        if changed:
+            self.local.clear()
+        return version
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["shared_hits"] + counters["misses"]
+        return {
+            **counters,
+            "evictions": self.local.evictions,
+            "size": len(self.local),
+            "max_entries": self.local.max_entries,
+            "ttl": self.ttl,
+            "shared_backend": self.shared_backend,
+            "version": self._version,
+            "hit_rate": round((counters["hits"] + counters["shared_hits"]) / lookups, 4) if lookups else 0,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = _config()
+                _cache = ProductCache(config["MAX_ENTRIES"], config["TTL"], config["SHARED_BACKEND"])
+    return _cache
+
+
+def _product_key(product_id):
+    return f"products:id:{product_id}"
+
+
+def get_products(product_ids):
+    """
+    Returns {product_id: serialized product} for the given ids.
+    Cache misses are loaded with a single $in query; unknown or malformed ids are left out.
+    """
+    cache = get_cache()
+    ids = list(dict.fromkeys(str(pid) for pid in product_ids if ObjectId.is_valid(str(pid))))
+    if not ids:
+        return {}
+
+    cache.version()  # drops the local tier after a catalog write in another process
+    keys = {pid: _product_key(pid) for pid in ids}
+    cached = cache.get_many(list(keys.values()))
+    result = {pid: cached[keys[pid]] for pid in ids if keys[pid] in cached}
+
+    missing = [pid for pid in ids if pid not in result]
+    if missing:
+        loaded = {
+            str(product.id): serialize_product(product)
+            for product in Product.objects(id__in=[ObjectId(pid) for pid in missing])
+        }
+        cache.set_many({keys[pid]: data for pid, data in loaded.items()})
+        result.update(loaded)
+
+    return result
+
+
+def get_product(product_id):
+    """
+    Returns the serialized product or None.
+    """
+    return get_products([product_id]).get(str(product_id))
+
+
+def get_product_list(query_key, loader):
+    """
+    Returns the cached list response for query_key, calling loader() on a miss.
+    """
+    cache = get_cache()
+    key = f"products:{cache.version()}:list:{query_key}"
+    cached = cache.get_many([key])
+    if key in cached:
+        return cached[key]
+
+    data = loader()
+    cache.set_many({key: data})
+    return data
+
+
+def invalidate_products(product_ids, stock_only=False):
+    """
+    Drops the given products. Unless stock_only, also bumps the "products"
+    version behind the catalog ETags, which retires every cached list page.
+    Call after any product write; stock_only=True suits checkouts.
+    """
+    cache = get_cache()
+    cache.delete_many([_product_key(pid) for pid in product_ids])
+    if not stock_only:
+        bump_version("products")
+        cache.version()
+    cache._count("invalidations")
+
+
+def invalidate_product(product_id):
+    invalidate_products([product_id])
+
+
+def cache_stats():
+    return get_cache().stats()
@@ -0,0 +1,133 @@
+"""
+Product image uploads.
+
+Uploads are streamed to a temporary file in chunks while being hashed, and
+stored under their content hash (products/<ab>/<sha256>.<ext>), so the same
+picture uploaded twice is stored once. Resized WebP variants are generated at
+upload time for product grids and detail pages; they need Pillow, without it
+only the original is kept.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .models import Product
+
+try:
+    from PIL import Image, ImageOps  # optional: resized variants
+except ImportError:
+    Image = None
+
+# name -> longest side in pixels
+IMAGE_VARIANTS = {
+    "thumbnail": 160,
+    "card": 480,
+    "detail": 1200,
+}
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif"}
+PIL_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp", "GIF": ".gif"}
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def save_image(uploaded_file):
+    """
+    Stores an uploaded image (Django UploadedFile) and its variants.
+    Returns (image_url, image_variants) as storage paths, like image_url always was.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(suffix=".upload") as tmp:
+        # 1. Stream to disk and hash, never holding the whole file in memory
+        for chunk in uploaded_file.chunks():
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise InvalidImage(f"Image must be at most {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+            digest.update(chunk)
+            tmp.write(chunk)
+        tmp.flush()
+
+        # 2. Work out the real type (Pillow) or trust the extension
+        extension = detect_extension(tmp.name, uploaded_file.name)
+        base = f"products/{digest.hexdigest()[:2]}/{digest.hexdigest()}"
+        image_url = base + extension
+
+        # 3. Same content already stored -> reuse it
+        if not default_storage.exists(image_url):
+            tmp.seek(0)
+            image_url = default_storage.save(image_url, File(tmp))
+
+        # 4. Variants
+        variants = {}
+        if Image is not None:
+            variants = save_variants(tmp.name, base)
+
+    return image_url, variants
+
+
+def detect_extension(path, filename):
+    if Image is not None:
+        try:
+            with Image.open(path) as img:
+                img.verify()
+                image_format = img.format
+        except Exception:
+            raise InvalidImage("Uploaded file is not a valid image")
+        if image_format not in PIL_EXTENSIONS:
+            raise InvalidImage(f"Unsupported image format: {image_format}")
+        return PIL_EXTENSIONS[image_format]
+
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise InvalidImage("Image must be a JPEG, PNG, WebP or GIF file")
+    return ".jpg" if extension == ".jpeg" else extension
+
+
+def save_variants(path, base):
+    """
+    Writes one WebP per IMAGE_VARIANTS entry (skipping those already stored).
+    """
+    variants = {}
+    with Image.open(path) as img:
+        # Decode JPEGs at a reduced scale when the biggest variant allows it
+        img.draft("RGB", (max(IMAGE_VARIANTS.values()),) * 2)
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            has_alpha = img.mode in ("LA", "PA") or "transparency" in img.info
+            img = img.convert("RGBA" if has_alpha else "RGB")
+
+        for name, longest_side in sorted(IMAGE_VARIANTS.items(), key=lambda item: -item[1]):
+            variant_path = f"{base}_{name}.webp"
+            if not default_storage.exists(variant_path):
+                resized = img.copy()
+                resized.thumbnail((longest_side, longest_side), Image.LANCZOS)
+                with tempfile.TemporaryFile() as out:
+                    resized.save(out, "WEBP", quality=82, method=4)
+                    out.seek(0)
+                    variant_path = default_storage.save(variant_path, File(out))
+            variants[name] = variant_path
+    return variants
+
+
+def is_local(image_url):
+    return bool(image_url) and not image_url.startswith("http://") and not image_url.startswith("https://")
+
+
+def delete_image(image_url, image_variants=None):
+    """
+    Deletes an uploaded image and its variants from storage, unless another
+    product still uses the same (deduplicated) file. Remote URLs are left alone.
+    Call after the product itself was deleted or changed.
+    """
+    if not is_local(image_url) or Product.objects(image_url=image_url).only("id").first():
+        return
+    for path in [image_url, *(image_variants or {}).values()]:
+        if default_storage.exists(path):
+            default_storage.delete(path)
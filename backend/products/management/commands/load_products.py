@@ -1,46 +1,144 @@
 import json
 import os
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from pymongo import UpdateOne
 from products.models import Product
+from products.cache import invalidate_products
+
+try:
+    import ijson  # optional: streams huge files instead of loading them at once
+except ImportError:
+    ijson = None
+
+FIELDS = ("price", "category", "image_url", "stock", "description", "features")
+
+
+def iter_products(path):
+    """
+    Yields the products of a JSON array file one at a time.
+    """
+    with open(path, 'rb') as f:
+        if ijson is not None:
+            yield from ijson.items(f, 'item')
+        else:
+            yield from json.load(f)
+
+
+def clean_product(p):
+    # Strip whitespace from name to avoid hidden chars
+    return {
+        "name": p['name'].strip(),
+        "price": float(p['price']),
+        "category": p['category'].strip(),
+        "image_url": (p.get('image_url') or p.get('image') or '').strip(),
+        "stock": int(p.get('stock', 0)),
+        "description": (p.get('description') or '').strip(),
+        "features": [str(f) for f in p.get('features', [])],
+    }
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
 class Command(BaseCommand):
-    help = 'Load products from JSON file into MongoDB'
+    help = 'Load products from JSON file into MongoDB (bulk upsert keyed on the unique product name)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='JSON array of products (default: products/products.json)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Products sent per bulk_write')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would be inserted / updated, without writing')
 
-    def handle(self, *args, **kwargs):
-        json_file_path = os.path.join(settings.BASE_DIR, 'products', 'products.json')
+    def handle(self, *args, **options):
+        json_file_path = options['file'] or os.path.join(settings.BASE_DIR, 'products', 'products.json')
 
         if not os.path.exists(json_file_path):
             self.stdout.write(self.style.ERROR(f'File not found: {json_file_path}'))
             return
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
 
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            products = json.load(f)
-
-        for p in products:
-            # Strip whitespace from name to avoid hidden chars
-            name = p['name'].strip()
-
-            product_obj = Product.objects(name=name).first()
-            if product_obj:
-                # Update existing
-                product_obj.price = float(p['price'])
-                product_obj.category = p['category'].strip()
-                product_obj.image = p.get('image', '').strip()
-                product_obj.stock = int(p.get('stock', 0))
-                product_obj.description = p.get('description', '').strip()
-                product_obj.features = p.get('features', [])
-                product_obj.save()
+        collection = Product._get_collection()
+        Product.ensure_indexes()  # the upsert relies on the unique name index
+        totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        for batch in batched(iter_products(json_file_path), options['batch_size']):
+            # Last occurrence wins when a name repeats inside the file
+            products = {p["name"]: p for p in map(clean_product, batch)}
+
+            if options['dry_run']:
+                counts = self.diff_batch(collection, products)
             else:
-                # Create new
-                Product(
-                    name=name,
-                    price=float(p['price']),
-                    category=p['category'].strip(),
-                    image=p.get('image', '').strip(),
-                    stock=int(p.get('stock', 0)),
-                    description=p.get('description', '').strip(),
-                    features=p.get('features', [])
-                ).save()
-
-        self.stdout.write(self.style.SUCCESS(f'{len(products)} product(s) loaded successfully!'))
+                counts = self.write_batch(collection, products)
+            for key in totals:
+                totals[key] += counts[key]
+
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{totals['inserted']} inserted, {totals['updated']} updated, "
+            f"{totals['unchanged']} unchanged"
+        ))
+
+    def write_batch(self, collection, products):
+        ops = [
+            UpdateOne(
+                {"name": name},
+                {"$set": {field: p[field] for field in FIELDS}},
+                upsert=True,
+            )
+            for name, p in products.items()
+        ]
+        result = collection.bulk_write(ops, ordered=False)
+
+        # Drop the cached copies of the products that changed
+        touched = [str(_id) for _id in result.upserted_ids.values()]
+        if result.modified_count:
+            touched += [
+                str(doc["_id"])
+                for doc in collection.find({"name": {"$in": list(products)}}, {"_id": 1})
+            ]
+        if touched:
+            invalidate_products(set(touched))
+
+        return {
+            "inserted": result.upserted_count,
+            "updated": result.modified_count,
+            "unchanged": result.matched_count - result.modified_count,
+        }
+
+    def diff_batch(self, collection, products):
+        existing = {
+            doc["name"]: doc
+            for doc in collection.find({"name": {"$in": list(products)}}, {field: 1 for field in ("name",) + FIELDS})
+        }
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for name, p in products.items():
+            current = existing.get(name)
+            if current is None:
+                counts["inserted"] += 1
+                self.stdout.write(f'+ {name}')
+                continue
+
+            changes = {
+                field: (current.get(field), p[field])
+                for field in FIELDS if current.get(field) != p[field]
+            }
+            if not changes:
+                counts["unchanged"] += 1
+                continue
+
+            counts["updated"] += 1
+            self.stdout.write(f'~ {name}')
+            for field, (old, new) in changes.items():
+                self.stdout.write(f'    {field}: {old!r} -> {new!r}')
+        return counts
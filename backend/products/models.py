@@ -1,4 +1,4 @@
-from mongoengine import Document, StringField, FloatField, IntField, ListField
+from mongoengine import Document, StringField, FloatField, IntField, ListField, DictField
 
 class Product(Document):
     name = StringField(max_length=255, required=True)       # Product name
@@ -9,6 +9,33 @@ class Product(Document):
     features = ListField(StringField(max_length=200))       # List of features
 
     image_url = StringField()    # optional URL
+    image_variants = DictField()  # resized uploads, e.g. {"card": "products/ab/<sha256>_card.webp"} (products/images.py)
+
+    # Bumped by every admin edit; ProductUpdateView uses it for optimistic concurrency
+    version = IntField(default=0)
+
+    # Tokens of in-flight checkout reservations (orders/checkout.py), normally empty
+    reservations = ListField(StringField())
+
+    meta = {
+        # Built by `manage.py ensure_indexes` (load_products builds them too)
+        "auto_create_index": False,
+        # Back the list filters / sort keys of ProductListView
+        "indexes": [
+            ("category", "price"),
+            "price",
+            # Unique: load_products upserts on it
+            {"fields": ["name"], "unique": True},
+            # Deleting an image first checks no other product shares the (deduplicated) file
+            "image_url",
+            # Text index behind /api/products/search/ (one per collection)
+            {
+                "fields": ["$name", "$description", "$features"],
+                "default_language": "english",
+                "weights": {"name": 10, "features": 3, "description": 1},
+            },
+        ]
+    }
 
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Product search: relevance-ranked full-text search over the Product text index
+(name, description, features) with category and price facets, in one
+aggregation round trip.
+
+Facets are disjunctive: the category counts ignore the category filter and the
+price counts ignore the price filter, so the storefront can show how many
+results every other choice would give.
+"""
+from backend.pagination import decode_cursor, encode_cursor, keyset_query
+
+from .models import Product
+from .serializers import serialize_product
+
+# Lower bounds of the price facet buckets; anything from the last one up is "1000+"
+PRICE_BUCKETS = [0, 25, 50, 100, 250, 500, 1000]
+
+
+def parse_search_filters(params):
+    """
+    Turns the category / min_price / max_price / in_stock params into
+    raw Mongo filters: (always-on filter, category filter, price filter).
+    """
+    base = {}
+    if params.get("in_stock", "").lower() in ("1", "true", "yes"):
+        base["stock"] = {"$gt": 0}
+
+    category_filter = {}
+    categories = [c.strip() for c in params.get("category", "").split(",") if c.strip()]
+    if categories:
+        category_filter["category"] = {"$in": categories}
+
+    price_filter = {}
+    try:
+        price = {}
+        if params.get("min_price"):
+            price["$gte"] = float(params["min_price"])
+        if params.get("max_price"):
+            price["$lte"] = float(params["max_price"])
+    except ValueError:
+        raise ValueError("Price filters must be numbers")
+    if price:
+        price_filter["price"] = price
+
+    return base, category_filter, price_filter
+
+
+def search_products(query, params, limit, cursor=None):
+    """
+    Returns {"results", "next_cursor", "total", "facets"} for one page.
+    With a query, results are sorted by text score; without one, by _id.
+    """
+    base, category_filter, price_filter = parse_search_filters(params)
+
+    # 1. $text must be the first stage; it also narrows everything else
+    pipeline = []
+    if query:
+        pipeline.append({"$match": {"$text": {"$search": query}, **base}})
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+        sort_field, sort = "score", {"score": -1, "_id": -1}
+    else:
+        if base:
+            pipeline.append({"$match": base})
+        sort_field, sort = "_id", {"_id": 1}
+    pipeline.append({"$project": {"reservations": 0}})
+
+    # 2. Results page (keyset on score, _id) plus facets in a single $facet
+    page = [{"$match": {**category_filter, **price_filter}}]
+    if cursor:
+        page.append({"$match": keyset_query(sort_field, bool(query), decode_cursor(cursor))})
+    page += [{"$sort": sort}, {"$limit": limit + 1}]
+
+    pipeline.append({"$facet": {
+        "results": page,
+        "total": [{"$match": {**category_filter, **price_filter}}, {"$count": "count"}],
+        "categories": [
+            {"$match": price_filter},
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+        "prices": [
+            {"$match": category_filter},
+            {"$bucket": {
+                "groupBy": "$price",
+                "boundaries": PRICE_BUCKETS,
+                "default": "other",
+                "output": {"count": {"$sum": 1}},
+            }},
+        ],
+    }})
+
+    facets = next(Product.objects.aggregate(pipeline))
+
+    rows = facets["results"]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last["score"], last["_id"]] if query else [last["_id"]])
+
+    results = []
+    for row in rows:
+        score = row.pop("score", None)
+        data = serialize_product(Product._from_son(row))
+        if score is not None:
+            data["score"] = round(score, 4)
+        results.append(data)
+
+    return {
+        "results": results,
+        "next_cursor": next_cursor,
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "facets": {
+            "category": [{"value": f["_id"], "count": f["count"]} for f in facets["categories"]],
+            "price": [price_bucket(f) for f in facets["prices"]],
+        },
+    }
+
+
+def price_bucket(facet):
+    if facet["_id"] == "other":
+        return {"min": PRICE_BUCKETS[-1], "max": None, "count": facet["count"]}
+    index = PRICE_BUCKETS.index(facet["_id"])
+    return {"min": facet["_id"], "max": PRICE_BUCKETS[index + 1], "count": facet["count"]}
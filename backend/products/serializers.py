@@ -4,4 +4,85 @@ from .models import Product
 class ProductSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'  # This includes all fields of Product
\ No newline at end of file
+        fields = '__all__'  # This includes all fields of Product
+
+def serialize_product(product, fields=None):
+    """
+    Serialize product to dict, only using image_url
+    If fields is given, only those fields (plus _id) are returned.
+    """
+    data = {
+        "_id": str(product.id),
+        "name": product.name,
+        "price": product.price,
+        "category": product.category,
+        "stock": product.stock,
+        "description": getattr(product, "description", ""),
+        "features": list(getattr(product, "features", None) or []),
+        "image_url": product.image_url,
+        "image_variants": dict(getattr(product, "image_variants", None) or {}),
+        "version": product.version or 0,
+    }
+    return project_product(data, fields)
+
+
+def project_product(data, fields=None):
+    """
+    Keeps only the requested fields (plus _id) of a serialized product.
+    """
+    if fields:
+        return {key: data[key] for key in ("_id",) + tuple(fields)}
+    return data
+
+
+def clean_product_data(data, partial=False):
+    """
+    Validates and converts incoming product fields (JSON body of the bulk API).
+    Returns a dict of cleaned fields; raises ValueError with a readable message.
+    With partial=True only the given fields are checked (patch).
+    """
+    cleaned = {}
+    required = () if partial else ("name", "price", "category")
+    missing = [field for field in required if data.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+
+    for field, max_length in (("name", 255), ("category", 100), ("description", 1000), ("image_url", None)):
+        if field in data:
+            value = "" if data[field] is None else str(data[field]).strip()
+            if max_length and len(value) > max_length:
+                raise ValueError(f"{field} must be at most {max_length} characters")
+            cleaned[field] = value
+
+    if "price" in data:
+        try:
+            cleaned["price"] = float(data["price"])
+        except (TypeError, ValueError):
+            raise ValueError("Price must be a number")
+
+    if "stock" in data:
+        try:
+            cleaned["stock"] = int(data["stock"])
+        except (TypeError, ValueError):
+            raise ValueError("Stock must be an integer")
+
+    if "features" in data:
+        features = data["features"]
+        if not isinstance(features, (list, tuple)):
+            raise ValueError("Features must be a list")
+        cleaned["features"] = [str(f) for f in features]
+
+    if "image_url" in cleaned:
+        # Variants belong to an uploaded file; a new URL has none
+        cleaned["image_variants"] = {}
+
+    unknown = set(data) - set(cleaned) - {"_id", "id"}
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+    if not partial:
+        cleaned.setdefault("stock", 0)
+        cleaned.setdefault("description", "")
+        cleaned.setdefault("features", [])
+        cleaned.setdefault("image_url", "")
+    return cleaned
@@ -1,3 +1,88 @@
-from django.test import TestCase
+import os
+import unittest
+from unittest import mock
 
-# Create your tests here.
+import mongoengine
+from django.test import SimpleTestCase
+from mongoengine.connection import get_db
+from rest_framework.test import APIClient
+
+from backend import conditional
+from users.cart_service import add_to_cart
+from users.models import User
+from . import cache as product_cache
+from .models import Product
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+MONGO_TEST_URI = os.getenv("MONGO_TEST_URI")
+
+
+@unittest.skipUnless(MONGO_TEST_URI or mongomock, "needs MONGO_TEST_URI or mongomock")
+class CartQueryCountTest(SimpleTestCase):
+    """
+    Reading a cart costs one product query ($in on the cache misses), whatever its size.
+    """
+
+    def setUp(self):
+        mongoengine.disconnect()
+        if MONGO_TEST_URI:
+            mongoengine.connect(host=MONGO_TEST_URI)
+        else:
+            mongoengine.connect("test", mongo_client_class=mongomock.MongoClient)
+        self.addCleanup(self._drop)
+        product_cache._cache = None
+        conditional._versions.clear()
+
+    def _drop(self):
+        db = get_db()
+        db.client.drop_database(db.name)
+        mongoengine.disconnect()
+
+    def _user_with_cart(self, size):
+        user = User(full_name=f"Camper {size}", email=f"camper{size}@example.com", password="x").save()
+        for i in range(size):
+            product = Product(name=f"Item {size}-{i}", price=10 + i, category="Gear", stock=5).save()
+            add_to_cart(str(user.id), str(product.id))
+        return user
+
+    def _product_queries(self, user):
+        """
+        GETs the cart and returns (its items, the number of queries on the product collection).
+        """
+        collection = Product._get_collection()
+        find = type(collection).find
+        queries = []
+
+        def counting_find(self, *args, **kwargs):
+            if self.name == collection.name:
+                queries.append(args)
+            return find(self, *args, **kwargs)
+
+        with mock.patch.object(type(collection), "find", counting_find):
+            response = APIClient().get(f"/api/users/cart/{user.id}/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["items"], len(queries)
+
+    def test_one_product_query_per_cart(self):
+        for size in (1, 20):
+            with self.subTest(size=size):
+                user = self._user_with_cart(size)
+                product_cache._cache = None  # cold cache: every product is a miss
+
+                items, queries = self._product_queries(user)
+
+                self.assertEqual(len(items), size)
+                self.assertEqual(queries, 1)
+
+    def test_warm_cache_skips_the_product_query(self):
+        user = self._user_with_cart(5)
+        self._product_queries(user)
+
+        items, queries = self._product_queries(user)
+
+        self.assertEqual(len(items), 5)
+        self.assertEqual(queries, 0)
@@ -1,10 +1,15 @@
-from django.urls import path
-from .views import ProductListView, ProductDetailView, ProductCreateView, ProductUpdateView, ProductDeleteView
+from django.urls import path, re_path
+from .views import ProductListView, ProductDetailView, ProductCreateView, ProductUpdateView, ProductDeleteView, ProductBulkView, ProductSearchView
 
 urlpatterns = [
     path('', ProductListView.as_view(), name='product-list'),
+    path('bulk/', ProductBulkView.as_view(), name='product-bulk'),
+    path('bulk', ProductBulkView.as_view()),  # POST cannot follow an APPEND_SLASH redirect
+    path('search/', ProductSearchView.as_view(), name='product-search'),
+    path('search', ProductSearchView.as_view()),
     
-    path('<str:product_id>', ProductDetailView.as_view(), name='product-detail'),
+    # Only ObjectIds, so /search or /bulk without a slash never land on the detail view
+    re_path(r'^(?P<product_id>[0-9a-fA-F]{24})$', ProductDetailView.as_view(), name='product-detail'),
 
     path('create/', ProductCreateView.as_view(), name='product-create'),
     path('<str:product_id>/update/', ProductUpdateView.as_view(), name='product-update'),
@@ -1,29 +1,125 @@
 from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from mongoengine.errors import DoesNotExist
+from mongoengine.errors import DoesNotExist, NotUniqueError
 from .models import Product
-import os
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from .serializers import serialize_product, clean_product_data
+from .search import parse_search_filters, search_products
+from .images import InvalidImage, save_image, delete_image
+from .cache import get_product, get_product_list, invalidate_product, invalidate_products
 import json
+from urllib.parse import urlencode
+from backend.pagination import InvalidCursor, paginate, parse_limit
+from backend.conditional import conditional_response
+
+DUPLICATE_NAME_ERROR = "A product with this name already exists"
+
+# Catalog reads: browsers always revalidate (cheap 304s), shared caches / the CDN may keep them 30s
+CATALOG_CACHE_CONTROL = "public, max-age=0, s-maxage=30, must-revalidate"
 
 
 class ProductListView(APIView):
     """
     GET /api/products/
     Returns a list of all products
+
+    Optional query params:
+      category=Tents,Lighting   only these categories
+      min_price / max_price     price range
+      in_stock=true             only products with stock > 0
+      fields=name,price         only return these fields (plus _id)
+      sort=price | -price | name | -name   (default: _id)
+      limit / cursor            keyset pagination; the response becomes
+                                {"results": [...], "next_cursor": "..."}
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return conditional_response(request, "products", lambda: self.build(request), CATALOG_CACHE_CONTROL)
+
+    def build(self, request):
+        params = request.query_params
+        try:
+            products = filter_products(Product.objects(), params)
+            fields = parse_product_fields(params.get("fields"))
+            sort_field, descending = parse_product_sort(params.get("sort"))
+            paginated = "limit" in params or "cursor" in params
+            limit = parse_limit(params.get("limit")) if paginated else None
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def load():
+            return list_products(products, fields, sort_field, descending, limit, params.get("cursor"))
+
+        # Same params (in any order) -> same cache entry
+        query_key = urlencode(sorted(params.items()))
+        try:
+            data = get_product_list(query_key, load)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ProductSearchView(APIView):
+    """
+    GET /api/products/search/?q=tent
+    Relevance-ranked text search over name, description and features.
+
+    Takes the same category / min_price / max_price / in_stock filters as the
+    list, plus limit / cursor, and returns
+    {"results", "next_cursor", "total", "facets": {"category", "price"}}.
     """
     permission_classes = [AllowAny]
 
     def get(self, request):
-        products = Product.objects()
-        data = [serialize_product(p) for p in products]
+        return conditional_response(request, "products", lambda: self.build(request), CATALOG_CACHE_CONTROL)
+
+    def build(self, request):
+        params = request.query_params
+        query = params.get("q", "").strip()
+        try:
+            limit = parse_limit(params.get("limit"), default=20)
+            parse_search_filters(params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def load():
+            return search_products(query, params, limit, params.get("cursor"))
+
+        query_key = "search:" + urlencode(sorted(params.items()))
+        try:
+            data = get_product_list(query_key, load)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         return Response(data, status=status.HTTP_200_OK)
 
 
+def list_products(products, fields, sort_field, descending, limit=None, cursor=None):
+    """
+    Runs a ProductListView query. Without a limit the whole (filtered) list is returned,
+    otherwise one page as {"results": [...], "next_cursor": ...}.
+    """
+    if fields:
+        # The sort key is needed to build the next cursor even if it is not returned
+        loaded = set(fields) | ({sort_field} if sort_field != "_id" else set())
+        products = products.only(*loaded)
+
+    if limit is None:
+        if sort_field != "_id":
+            products = products.order_by(f"{'-' if descending else '+'}{sort_field}", "+id")
+        return [serialize_product(p, fields) for p in products]
+
+    page, next_cursor = paginate(products, sort_field, descending, limit, cursor)
+    return {
+        "results": [serialize_product(p, fields) for p in page],
+        "next_cursor": next_cursor,
+    }
+
+
 class ProductDetailView(APIView):
     """
     GET /api/products/<product_id>/
@@ -32,12 +128,13 @@ class ProductDetailView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, product_id):
-        try:
-            product = Product.objects.get(id=ObjectId(product_id))
-            data = serialize_product(product)
+        def build():
+            data = get_product(product_id)
+            if data is None:
+                return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
             return Response(data, status=status.HTTP_200_OK)
-        except DoesNotExist:
-            return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return conditional_response(request, "products", build, CATALOG_CACHE_CONTROL)
 
 
 class ProductCreateView(APIView):
@@ -56,69 +153,133 @@ class ProductCreateView(APIView):
 
         # Handle image: file upload or URL
         if "image_file" in request.FILES:
-            image_file = request.FILES["image_file"]
-            # Save to products folder
-            upload_path = os.path.join("products", image_file.name)
-            saved_path = default_storage.save(upload_path, ContentFile(image_file.read()))
-            product.image_url = saved_path  # just save the filename/path
+            try:
+                product.image_url, product.image_variants = save_image(request.FILES["image_file"])
+            except InvalidImage as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         else:
             product.image_url = data.get("image_url", "")
 
-        product.save()
+        try:
+            product.save()
+        except NotUniqueError:
+            # Product names are unique; drop the image uploaded for nothing
+            delete_image(product.image_url, product.image_variants)
+            return Response({"error": DUPLICATE_NAME_ERROR}, status=status.HTTP_409_CONFLICT)
+        invalidate_product(product.id)
         return Response({"_id": str(product.id)}, status=status.HTTP_201_CREATED)
 
 
 class ProductUpdateView(APIView):
+    """
+    PATCH /api/products/<product_id>/update/   (PUT is accepted too)
+    Updates only the fields sent, in a single find_one_and_update, and returns
+    the updated product.
+
+    Optimistic concurrency: send the version you edited, either as an
+    X-Product-Version header or as a "version" field (not If-Match: the
+    catalog ETags are collection-wide, not product versions). If the product
+    changed since, nothing is written and 409 is returned with the current
+    product.
+    Without a version the update is applied unconditionally.
+    """
     permission_classes = [AllowAny]
 
-    def put(self, request, product_id):
+    def patch(self, request, product_id):
+        if not ObjectId.is_valid(product_id):
+            return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+
         try:
-            product = Product.objects.get(id=ObjectId(product_id))
+            fields = product_update_fields(request.data)
+            expected_version = parse_expected_version(request)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Handle standard fields
-            for field in ["name", "category", "description"]:
-                if field in request.data:
-                    setattr(product, field, request.data[field])
+        if not fields and "image_file" not in request.FILES:
+            return Response({"error": "Nothing to update"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Convert price and stock to numbers
-            if "price" in request.data:
-                try:
-                    product.price = float(request.data["price"])
-                except ValueError:
-                    return Response({"error": "Price must be a number"}, status=400)
+        # Handle image
+        uploaded = "image_file" in request.FILES
+        if uploaded:
+            try:
+                fields["image_url"], fields["image_variants"] = save_image(request.FILES["image_file"])
+            except InvalidImage as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        def discard_upload():
+            # Nothing was written: drop the image stored for this request
+            if uploaded:
+                delete_image(fields["image_url"], fields["image_variants"])
 
-            if "stock" in request.data:
+        query = {"_id": ObjectId(product_id)}
+        if expected_version is not None:
+            # Products written before versioning have no field: they count as version 0
+            query["version"] = {"$in": [expected_version, None]} if expected_version == 0 else expected_version
+
+        try:
+            doc = Product._get_collection().find_one_and_update(
+                query,
+                {"$set": fields, "$inc": {"version": 1}},
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            discard_upload()
+            return Response({"error": DUPLICATE_NAME_ERROR}, status=status.HTTP_409_CONFLICT)
+
+        if doc is None:
+            discard_upload()
+            current = get_product(product_id) if expected_version is not None else None
+            if current is None:
+                return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(
+                {"error": "Product was modified by someone else", "product": current},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        invalidate_product(product_id)
+        return Response(serialize_product(Product._from_son(doc)), status=status.HTTP_200_OK)
+
+    def put(self, request, product_id):
+        return self.patch(request, product_id)
+
+
+def product_update_fields(data):
+    """
+    Picks the product fields out of a JSON or multipart body and validates them.
+    Other keys are ignored.
+    """
+    fields = {}
+    for field in PRODUCT_FIELDS:
+        if field not in data:
+            continue
+        if field == "features":
+            features = data.getlist("features") if hasattr(data, "getlist") else data["features"]
+            # Multipart forms may send the list as one JSON string
+            if isinstance(features, list) and len(features) == 1 and isinstance(features[0], str) \
+                    and features[0].lstrip().startswith("["):
+                features = features[0]
+            if isinstance(features, str):
                 try:
-                    product.stock = int(request.data["stock"])
-                except ValueError:
-                    return Response({"error": "Stock must be an integer"}, status=400)
-
-            # Convert features to list if sent as JSON string
-            if "features" in request.data:
-                features = request.data.getlist("features")
-                if isinstance(features, str):
-                    try:
-                        features = json.loads(features)
-                    except json.JSONDecodeError:
-                        return Response({"error": "Features must be a valid JSON array"}, status=400)
-                if not isinstance(features, (list, tuple)):
-                    return Response({"error": "Features must be a list"}, status=400)
-                product.features = features
-
-            # Handle image
-            if "image_file" in request.FILES:
-                image_file = request.FILES["image_file"]
-                upload_path = os.path.join("products", image_file.name)
-                saved_path = default_storage.save(upload_path, ContentFile(image_file.read()))
-                product.image_url = saved_path
-            elif "image_url" in request.data:
-                product.image_url = request.data.get("image_url", "")
+                    features = json.loads(features)
+                except json.JSONDecodeError:
+                    raise ValueError("Features must be a valid JSON array")
+            fields["features"] = features
+        else:
+            fields[field] = data[field]
+    return clean_product_data(fields, partial=True)
 
-            product.save()
-            return Response({"message": "Product updated"}, status=status.HTTP_200_OK)
 
-        except DoesNotExist:
-            return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+def parse_expected_version(request):
+    """
+    Reads the version the client edited from X-Product-Version or the body.
+    """
+    value = request.headers.get("X-Product-Version") or request.data.get("version")
+    if value in (None, ""):
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError("Version must be an integer")
 
 
 class ProductDeleteView(APIView):
@@ -132,31 +293,176 @@ class ProductDeleteView(APIView):
         try:
             product = Product.objects.get(id=ObjectId(product_id))
             
-            # Delete image file from disk if it's a local file
-            if product.image_url and not product.image_url.startswith("http://") and not product.image_url.startswith("https://"):
-                if default_storage.exists(product.image_url):
-                    default_storage.delete(product.image_url)
-            
             # Delete the product document
             product.delete()
-            
+            invalidate_product(product_id)
+
+            # Delete image file (and its variants) from disk if it's a local file
+            delete_image(product.image_url, product.image_variants)
+
             return Response({"message": "Product and its image deleted"}, status=status.HTTP_200_OK)
         
         except DoesNotExist:
             return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-def serialize_product(product):
+MAX_BULK_OPERATIONS = 5000
+
+
+class ProductBulkView(APIView):
     """
-    Serialize product to dict, only using image_url
+    POST /api/products/bulk/
+    Applies many product writes in one call:
+      [{"op": "create", "data": {...}},
+       {"op": "update", "id": "...", "data": {"price": 9.99}},   # partial
+       {"op": "delete", "id": "..."}]
+    Every operation is validated first; if any is invalid nothing is written.
+    The valid batch is sent as one unordered bulk_write, and one result per
+    operation is returned in the same order.
     """
-    return {
-        "_id": str(product.id),
-        "name": product.name,
-        "price": product.price,
-        "category": product.category,
-        "stock": product.stock,
-        "description": getattr(product, "description", ""),
-        "features": getattr(product, "features", []),
-        "image_url": product.image_url,
-    }
\ No newline at end of file
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        operations = request.data.get("operations") if isinstance(request.data, dict) else request.data
+        if not isinstance(operations, list) or not operations:
+            return Response({"error": "Send a non-empty list of operations"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > MAX_BULK_OPERATIONS:
+            return Response({"error": f"At most {MAX_BULK_OPERATIONS} operations per call"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # 1. Validate everything before writing anything
+        parsed, errors = [], []
+        for index, operation in enumerate(operations):
+            try:
+                parsed.append(parse_bulk_operation(operation))
+            except ValueError as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            return Response({"error": "Invalid operations", "details": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 2. One query to find which targeted products exist (and their images, for deletes)
+        collection = Product._get_collection()
+        target_ids = [op["id"] for op in parsed if op["op"] != "create"]
+        existing = {
+            doc["_id"]: doc for doc in collection.find({"_id": {"$in": target_ids}}, {"image_url": 1, "image_variants": 1})
+        } if target_ids else {}
+
+        results = [None] * len(parsed)
+        requests, request_index = [], []
+        for index, op in enumerate(parsed):
+            if op["op"] != "create" and op["id"] not in existing:
+                results[index] = {"index": index, "op": op["op"], "_id": str(op["id"]), "status": "not_found"}
+                continue
+            if op["op"] == "create":
+                requests.append(InsertOne({"_id": op["id"], **op["data"]}))
+            elif op["op"] == "update":
+                requests.append(UpdateOne({"_id": op["id"]}, {"$set": op["data"], "$inc": {"version": 1}}))
+            else:
+                requests.append(DeleteOne({"_id": op["id"]}))
+            request_index.append(index)
+
+        # 3. A single unordered bulk_write; failed items do not stop the others
+        write_errors = {}
+        if requests:
+            try:
+                collection.bulk_write(requests, ordered=False)
+            except BulkWriteError as e:
+                write_errors = {err["index"]: err.get("errmsg", "Write failed") for err in e.details["writeErrors"]}
+
+        done = {"create": "created", "update": "updated", "delete": "deleted"}
+        touched, deleted = [], []
+        for position, index in enumerate(request_index):
+            op = parsed[index]
+            result = {"index": index, "op": op["op"], "_id": str(op["id"])}
+            if position in write_errors:
+                result.update(status="error", error=write_errors[position])
+            else:
+                result["status"] = done[op["op"]]
+                touched.append(str(op["id"]))
+                if op["op"] == "delete":
+                    deleted.append(index)
+            results[index] = result
+
+        if touched:
+            invalidate_products(touched)
+        for index in deleted:
+            doc = existing[parsed[index]["id"]]
+            delete_image(doc.get("image_url"), doc.get("image_variants"))
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+def parse_bulk_operation(operation):
+    if not isinstance(operation, dict):
+        raise ValueError("Each operation must be an object")
+
+    op = operation.get("op")
+    if op not in ("create", "update", "delete"):
+        raise ValueError("op must be create, update or delete")
+
+    if op == "create":
+        return {"op": op, "id": ObjectId(), "data": clean_product_data(operation.get("data") or {})}
+
+    product_id = operation.get("id")
+    if not product_id or not ObjectId.is_valid(str(product_id)):
+        raise ValueError("A valid product id is required")
+    if op == "delete":
+        return {"op": op, "id": ObjectId(str(product_id))}
+
+    data = clean_product_data(operation.get("data") or {}, partial=True)
+    if not data:
+        raise ValueError("Nothing to update")
+    return {"op": op, "id": ObjectId(str(product_id)), "data": data}
+
+
+# Fields a client may ask for through ?fields= (and sort through ?sort=)
+PRODUCT_FIELDS = ("name", "price", "category", "stock", "description", "features", "image_url")
+PRODUCT_SORT_FIELDS = ("name", "price", "stock", "category")
+
+
+def parse_product_fields(value):
+    """
+    Parses ?fields=name,price into a tuple of Product fields, or None for all fields.
+    """
+    if not value:
+        return None
+    fields = tuple(f.strip() for f in value.split(",") if f.strip() and f.strip() != "_id")
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def parse_product_sort(value):
+    """
+    Parses ?sort=-price into ("price", True). Defaults to _id ascending.
+    """
+    if not value:
+        return "_id", False
+    descending = value.startswith("-")
+    field = value.lstrip("-+")
+    if field not in PRODUCT_SORT_FIELDS + ("_id",):
+        raise ValueError(f"Cannot sort by '{field}'")
+    return field, descending
+
+
+def filter_products(products, params):
+    """
+    Pushes the category / price range / in_stock filters of a request down to Mongo.
+    """
+    category = params.get("category")
+    if category:
+        products = products.filter(category__in=[c.strip() for c in category.split(",") if c.strip()])
+
+    try:
+        if params.get("min_price"):
+            products = products.filter(price__gte=float(params["min_price"]))
+        if params.get("max_price"):
+            products = products.filter(price__lte=float(params["max_price"]))
+    except ValueError:
+        raise ValueError("Price filters must be numbers")
+
+    if params.get("in_stock", "").lower() in ("1", "true", "yes"):
+        products = products.filter(stock__gt=0)
+
+    return products
@@ -0,0 +1,62 @@
+"""
+Async version of the admin dashboard, for the ASGI read path (backend/async_urls.py).
+The independent queries run concurrently on the async driver; the JSON is the
+same as dashboard_stats.
+"""
+import asyncio
+
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from backend.mongo_async import async_collection
+from orders.async_views import fetch_order_users
+from orders.models import Order
+from products.async_views import fetch_products
+from products.models import Product
+from users.authentication import async_authenticated
+from users.models import User
+from .models import DailySalesRollup
+from .rollup import day_start
+from .views import (
+    dashboard_payload, dashboard_ranges, recent_order_rows, sum_periods,
+    top_product_rows, top_selling_pipeline,
+)
+
+
+async def aggregate(collection, pipeline):
+    return await (await collection.aggregate(pipeline)).to_list()
+
+
+@require_GET
+@async_authenticated
+async def dashboard_stats(request):
+    """
+    GET /api/async/stats/dashboard/
+    """
+    start_previous, start_current = dashboard_ranges(timezone.now())
+    rollup = async_collection(DailySalesRollup)
+
+    # 1. Everything that does not depend on another query, at once
+    rollup_rows, active_users_count, products_count, raw_orders, top_rows = await asyncio.gather(
+        rollup.find(
+            {"day": {"$gte": day_start(start_previous)}},
+            {"day": 1, "orders": 1, "revenue": 1, "new_users": 1},
+        ).to_list(),
+        async_collection(User).count_documents({"status": "Active"}),
+        async_collection(Product).count_documents({}),
+        async_collection(Order).find().sort("date", -1).limit(5).to_list(),
+        aggregate(rollup, top_selling_pipeline(5)),
+    )
+
+    # 2. Then the users of the recent orders and the top products, also at once
+    top_products = [{"product_id": row["_id"], "sales": int(row["sales"])} for row in top_rows]
+    users, products = await asyncio.gather(
+        fetch_order_users(raw_orders),
+        fetch_products(row["product_id"] for row in top_products),
+    )
+
+    return JsonResponse(dashboard_payload(
+        sum_periods(rollup_rows, start_current), active_users_count, products_count,
+        recent_order_rows(raw_orders, users), top_product_rows(top_products, products),
+    ))
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from mongoengine import Document
+from mongoengine.base.common import _document_registry
+from pymongo.errors import OperationFailure
+
+# Index options that make two indexes on the same keys different
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds")
+
+
+def index_key(fields, weights=None):
+    """
+    Comparable form of an index key. Text indexes are stored by the server as
+    _fts/_ftsx plus weights, so they are compared on their set of text fields.
+    """
+    fields = list(fields)
+    if any(field == "_fts" for field, _ in fields):
+        text_fields = sorted((field, "text") for field in (weights or {}))
+        return tuple(text_fields + [(f, d) for f, d in fields if f not in ("_fts", "_ftsx")])
+    text_fields = sorted((f, d) for f, d in fields if d == "text")
+    return tuple(text_fields + [(f, d) for f, d in fields if d != "text"])
+
+
+def index_options(spec):
+    return {option: spec[option] for option in COMPARED_OPTIONS if spec.get(option)}
+
+
+def declared_documents():
+    """
+    Every concrete Document class (models are imported by Django at startup).
+    """
+    documents = {}
+    for cls in _document_registry.values():
+        if issubclass(cls, Document) and not cls._meta.get("abstract"):
+            documents.setdefault(cls._get_collection_name(), cls)
+    return [documents[name] for name in sorted(documents)]
+
+
+class Command(BaseCommand):
+    help = ('Compare the indexes declared in the models meta with the live collections, '
+            'build the missing ones in the background and report unused ones ($indexStats)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report, do not build anything')
+
+    def handle(self, *args, **options):
+        totals = {"missing": 0, "different": 0, "undeclared": 0, "unused": 0}
+
+        for document in declared_documents():
+            # Not _get_collection(): with auto_create_index it would build the indexes itself
+            collection = document._get_db()[document._get_collection_name()]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{document.__name__} ({collection.name})'))
+
+            live = {
+                index_key(info["key"], info.get("weights")): (name, info)
+                for name, info in collection.index_information().items()
+            }
+            declared = {index_key(spec["fields"]): spec for spec in document._meta["index_specs"]}
+
+            # 1. Declared vs live
+            for key, spec in declared.items():
+                label = ", ".join(f"{field} {direction}" for field, direction in key)
+                if key not in live:
+                    totals["missing"] += 1
+                    if options['dry_run']:
+                        self.stdout.write(self.style.WARNING(f'  missing: {label}'))
+                        continue
+                    extra = {k: v for k, v in spec.items() if k != "fields"}
+                    name = collection.create_index(spec["fields"], background=True, **extra)
+                    self.stdout.write(self.style.SUCCESS(f'  built: {name}'))
+                elif index_options(spec) != index_options(live[key][1]):
+                    totals["different"] += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  options differ: {live[key][0]} (declared {index_options(spec)}, '
+                        f'live {index_options(live[key][1])}); drop it to rebuild'
+                    ))
+
+            for key, (name, _) in live.items():
+                if name != "_id_" and key not in declared:
+                    totals["undeclared"] += 1
+                    self.stdout.write(f'  not declared in meta: {name}')
+
+            # 2. Usage since the last server restart (per mongod, so run it against each node that serves reads)
+            try:
+                stats = list(collection.aggregate([{"$indexStats": {}}]))
+            except OperationFailure as e:
+                self.stdout.write(self.style.WARNING(f'  $indexStats unavailable: {e}'))
+                continue
+            for stat in sorted(stats, key=lambda s: s["name"]):
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0:
+                    totals["unused"] += 1
+                    self.stdout.write(f'  unused since {stat["accesses"]["since"]:%Y-%m-%d %H:%M}: {stat["name"]}')
+
+        verb = 'missing' if options['dry_run'] else 'built'
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['missing']} {verb}, {totals['different']} with different options, "
+            f"{totals['undeclared']} not declared, {totals['unused']} unused"
+        ))
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from orders.models import Order
+from users.models import User
+from stats.models import DailySalesRollup
+from stats.rollup import day_start, rebuild_range
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the DailySalesRollup collection from the order and user history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild days from this date on (YYYY-MM-DD)')
+        parser.add_argument('--chunk-days', type=int, default=31,
+                            help='Number of days aggregated (and held in memory) at a time')
+
+    def handle(self, *args, **options):
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        if options['since']:
+            try:
+                start = datetime.strptime(options['since'], '%Y-%m-%d')
+            except ValueError:
+                raise CommandError('--since must be a date like 2025-01-31')
+        else:
+            # Earliest order or user, whichever comes first
+            first_order = Order.objects.order_by('date').only('date').first()
+            first_user = User.objects.order_by('joined').only('joined').first()
+            dates = [d for d in (first_order and first_order.date, first_user and first_user.joined) if d]
+            if not dates:
+                DailySalesRollup.objects.delete()
+                self.stdout.write(self.style.SUCCESS('Nothing to roll up.'))
+                return
+            start = day_start(min(dates))
+
+        end = day_start(datetime.utcnow()) + timedelta(days=1)
+        step = timedelta(days=options['chunk_days'])
+
+        rows = 0
+        chunk_start = start
+        while chunk_start < end:
+            chunk_end = min(chunk_start + step, end)
+            rows += rebuild_range(chunk_start, chunk_end)
+            self.stdout.write(f'{chunk_start:%Y-%m-%d} .. {chunk_end:%Y-%m-%d}: done')
+            chunk_start = chunk_end
+
+        self.stdout.write(self.style.SUCCESS(f'{rows} rollup row(s) rebuilt!'))
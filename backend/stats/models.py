@@ -0,0 +1,18 @@
+from mongoengine import Document, DateTimeField, FloatField, IntField, DictField
+
+
+class DailySalesRollup(Document):
+    """
+    One row per UTC day, maintained incrementally by the order / user write
+    paths and rebuilt from history with `manage.py rebuild_sales_rollup`.
+    """
+    day = DateTimeField(required=True, unique=True)   # UTC midnight
+    revenue = FloatField(default=0)                    # amount of paid orders
+    orders = IntField(default=0)                       # all orders placed that day
+    new_users = IntField(default=0)                    # users who joined that day
+    units = DictField()                                # {product_id: units sold}
+
+    meta = {
+        "collection": "daily_sales_rollup",
+        "auto_create_index": False,  # manage.py ensure_indexes
+    }
@@ -0,0 +1,94 @@
+from datetime import datetime, timezone as dt_timezone
+
+from .models import DailySalesRollup
+
+
+def day_start(dt):
+    """
+    UTC midnight (naive, like the dates MongoEngine stores) of the day dt falls in.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(dt_timezone.utc).replace(tzinfo=None)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _inc(day, updates):
+    # Single upsert with $inc, so concurrent checkouts never lose an update
+    DailySalesRollup._get_collection().update_one(
+        {"day": day}, {"$inc": updates}, upsert=True
+    )
+
+
+def record_order(order, sign=1):
+    """
+    Adds an order to (sign=1) or removes it from (sign=-1) its day's rollup.
+    """
+    updates = {"orders": sign}
+    if order.status == "paid":
+        updates["revenue"] = sign * float(order.amount)
+    for item in order.items:
+        key = f"units.{item.product_id}"
+        updates[key] = updates.get(key, 0) + sign * int(item.quantity)
+    _inc(day_start(order.date), updates)
+
+
+def record_new_user(user, sign=1):
+    """
+    Adds a user to (sign=1) or removes it from (sign=-1) the new-users count of the day it joined.
+    """
+    _inc(day_start(user.joined), {"new_users": sign})
+
+
+def _by_day(field):
+    return {"$dateToString": {"format": "%Y-%m-%d", "date": field}}
+
+
+def rebuild_range(start, end):
+    """
+    Recomputes the rollup rows for the days in [start, end) from the raw orders and users.
+    Only that window is held in memory, so history can be rebuilt chunk by chunk.
+    Returns the number of rows written.
+    """
+    from orders.models import Order
+    from users.models import User
+
+    rows = {}
+
+    def row(day_key):
+        if day_key not in rows:
+            rows[day_key] = DailySalesRollup(day=datetime.strptime(day_key, "%Y-%m-%d"), units={})
+        return rows[day_key]
+
+    date_match = {"$match": {"date": {"$gte": start, "$lt": end}}}
+
+    for r in Order.objects.aggregate([
+        date_match,
+        {"$group": {
+            "_id": _by_day("$date"),
+            "orders": {"$sum": 1},
+            "revenue": {"$sum": {"$cond": [{"$eq": ["$status", "paid"]}, "$amount", 0]}},
+        }},
+    ]):
+        row(r["_id"]).orders = r["orders"]
+        row(r["_id"]).revenue = float(r["revenue"])
+
+    for r in Order.objects.aggregate([
+        date_match,
+        {"$unwind": "$items"},
+        {"$group": {
+            "_id": {"day": _by_day("$date"), "product_id": "$items.product_id"},
+            "units": {"$sum": "$items.quantity"},
+        }},
+    ]):
+        row(r["_id"]["day"]).units[r["_id"]["product_id"]] = int(r["units"])
+
+    for r in User.objects.aggregate([
+        {"$match": {"joined": {"$gte": start, "$lt": end}}},
+        {"$group": {"_id": _by_day("$joined"), "new_users": {"$sum": 1}}},
+    ]):
+        row(r["_id"]).new_users = r["new_users"]
+
+    DailySalesRollup.objects(day__gte=start, day__lt=end).delete()
+    if rows:
+        DailySalesRollup.objects.insert(list(rows.values()), load_bulk=False)
+    return len(rows)
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import dashboard_stats
+from .views import dashboard_stats, product_cache_stats
 
 urlpatterns = [
     path("dashboard/", dashboard_stats, name="dashboard-stats"),
+    path("product-cache/", product_cache_stats, name="product-cache-stats"),
 ]
\ No newline at end of file
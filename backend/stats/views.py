@@ -2,9 +2,15 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import time
 from users.models import User
 from orders.models import Order
+from orders.serializers import fetch_order_users
 from products.models import Product
+from products.cache import get_products, cache_stats
+from .models import DailySalesRollup
+from .rollup import day_start
 
 
 def percent_change(current, previous):
@@ -13,73 +19,185 @@ def percent_change(current, previous):
     return round(((current - previous) / previous) * 100, 2)
 
 
-@api_view(["GET"])
-def dashboard_stats(request):
-    now = timezone.now()
-
-    # ---- Date ranges ----
+def dashboard_ranges(now):
+    """
+    Start of the current and of the previous month.
+    """
     start_current = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     start_previous = (start_current - timedelta(days=1)).replace(day=1)
-    end_previous = start_current - timedelta(seconds=1)
-
-    # ---- Revenue ----
-    current_orders = Order.objects(status="paid", date__gte=start_current)
-    previous_orders = Order.objects(status="paid", date__gte=start_previous, date__lte=end_previous)
-
-    current_revenue = sum(float(o.amount) for o in current_orders)
-    previous_revenue = sum(float(o.amount) for o in previous_orders)
-
-    # ---- Orders count ----
-    current_orders_count = Order.objects(date__gte=start_current).count()
-    previous_orders_count = Order.objects(date__gte=start_previous, date__lte=end_previous).count()
-
-    # ---- Users ----
-    current_users = User.objects(joined__gte=start_current).count()
-    previous_users = User.objects(joined__gte=start_previous, joined__lte=end_previous).count()
-    active_users_count = User.objects(status="Active").count()
-
-    # ---- Recent orders (latest 5) ----
-    recent_orders = []
-    for o in Order.objects.order_by('-date')[:5]:
-        recent_orders.append({
-            "id": str(o.id),
-            "user": o.user.full_name if o.user else "Guest",
-            "amount": float(o.amount),
-            "items_count": len(o.items),
-            "status": o.status,
-            "date": o.date.isoformat()
-        })
-
-    # ---- Top products (by number of times ordered, latest 5) ----
-    product_sales = {}
-    for o in Order.objects:
-        for item in o.items:
-            product_sales[item.name] = product_sales.get(item.name, 0) + int(item.quantity)
-
-    top_products = sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_products_list = []
-    for name, sales in top_products:
-        product = Product.objects(name=name).first()  # safely get the first match
+    return start_previous, start_current
+
+
+def rollup_period_totals(start_previous, start_current):
+    """
+    Revenue, order count and new users for the previous and current month,
+    summed from the DailySalesRollup rows (about two months of rows).
+    """
+    rows = DailySalesRollup.objects(day__gte=day_start(start_previous)).only(
+        "day", "orders", "revenue", "new_users"
+    ).as_pymongo()
+    return sum_periods(rows, start_current)
+
+
+def sum_periods(rows, start_current):
+    totals = {
+        "current": {"orders": 0, "revenue": 0.0, "new_users": 0},
+        "previous": {"orders": 0, "revenue": 0.0, "new_users": 0},
+    }
+    current_day = day_start(start_current)
+    for row in rows:
+        period = totals["current" if row["day"] >= current_day else "previous"]
+        period["orders"] += row.get("orders", 0)
+        period["revenue"] += row.get("revenue", 0.0)
+        period["new_users"] += row.get("new_users", 0)
+    return totals
+
+
+def top_selling_pipeline(limit):
+    """
+    Best sellers of all time as {"_id": product_id, "sales"}, summed from the rollup rows by Mongo.
+    """
+    return [
+        {"$project": {"units": {"$objectToArray": "$units"}}},
+        {"$unwind": "$units"},
+        {"$group": {"_id": "$units.k", "sales": {"$sum": "$units.v"}}},
+        {"$match": {"sales": {"$gt": 0}}},
+        {"$sort": {"sales": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+
+
+def top_selling_products(limit):
+    """
+    Best sellers of all time as [{"product_id", "sales"}].
+    """
+    return [
+        {"product_id": row["_id"], "sales": int(row["sales"])}
+        for row in DailySalesRollup.objects.aggregate(top_selling_pipeline(limit))
+    ]
+
+
+def recent_order_rows(raw_orders, users):
+    """
+    The "recentOrders" entries, from raw orders and their users (fetch_order_users).
+    """
+    return [{
+        "id": str(o["_id"]),
+        "user": users[o["user"]]["name"] if o.get("user") in users else "Guest",
+        "amount": float(o.get("amount", 0)),
+        "items_count": len(o.get("items", [])),
+        "status": o.get("status", "pending"),
+        "date": o["date"].isoformat()
+    } for o in raw_orders]
+
+
+def top_product_rows(top_products, products):
+    """
+    The "topProducts" entries, from top_selling_products() and the serialized products.
+    """
+    rows = []
+    for row in top_products:
+        product = products.get(row["product_id"])
         if product:
-            top_products_list.append({
-                "name": product.name,
-                "price": float(product.price),
-                "sales": sales,
-                "image_url": product.image_url or ""
+            rows.append({
+                "name": product["name"],
+                "price": float(product["price"]),
+                "sales": row["sales"],
+                "image_url": product["image_url"] or ""
             })
+    return rows
+
 
-    return Response({
+def dashboard_payload(periods, active_users_count, products_count, recent_orders, top_products):
+    current_revenue = periods["current"]["revenue"]
+    previous_revenue = periods["previous"]["revenue"]
+    current_orders_count = periods["current"]["orders"]
+    previous_orders_count = periods["previous"]["orders"]
+    current_users = periods["current"]["new_users"]
+    previous_users = periods["previous"]["new_users"]
+
+    return {
         "totalRevenue": round(current_revenue, 2),
         "revenueChange": percent_change(current_revenue, previous_revenue),
 
         "orders": current_orders_count,
         "ordersChange": percent_change(current_orders_count, previous_orders_count),
 
-        "products": Product.objects.count(),
+        "products": products_count,
 
         "activeUsers": active_users_count,
         "usersChange": percent_change(current_users, previous_users),
 
         "recentOrders": recent_orders,
-        "topProducts": top_products_list
-    })
\ No newline at end of file
+        "topProducts": top_products
+    }
+
+
+# Shared by all dashboard requests: bounds the Mongo connections one busy dashboard can hold
+DASHBOARD_WORKERS = 6
+_dashboard_pool = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+
+
+def run_concurrently(queries, timings):
+    """
+    Runs {name: callable} on the dashboard pool and returns {name: result}.
+    The duration of each query (ms) is added to timings.
+    """
+    def timed(query):
+        start = time.perf_counter()
+        result = query()
+        return result, (time.perf_counter() - start) * 1000
+
+    futures = {name: _dashboard_pool.submit(timed, query) for name, query in queries.items()}
+    results = {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+    return results
+
+
+@api_view(["GET"])
+def dashboard_stats(request):
+    """
+    GET /api/stats/dashboard/
+    The independent queries run concurrently, so the latency is about the
+    slowest query rather than their sum. Per-query timings are returned in
+    the Server-Timing header.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    # ---- Date ranges ----
+    start_previous, start_current = dashboard_ranges(timezone.now())
+
+    # 1. Rollup totals, counts, latest 5 orders and best sellers at once
+    results = run_concurrently({
+        "periods": lambda: rollup_period_totals(start_previous, start_current),
+        "active_users": lambda: User.objects(status="Active").count(),
+        "products": lambda: Product.objects.count(),
+        "recent_orders": lambda: list(Order.objects.order_by('-date').limit(5).as_pymongo()),
+        "top_products": lambda: top_selling_products(5),
+    }, timings)
+    raw_orders, top_products = results["recent_orders"], results["top_products"]
+
+    # 2. What depends on them: the orders' users and the best sellers' products
+    details = run_concurrently({
+        "order_users": lambda: fetch_order_users(raw_orders),
+        "top_product_details": lambda: get_products(row["product_id"] for row in top_products),
+    }, timings)
+
+    response = Response(dashboard_payload(
+        results["periods"], results["active_users"], results["products"],
+        recent_order_rows(raw_orders, details["order_users"]),
+        top_product_rows(top_products, details["top_product_details"]),
+    ))
+    timings["total"] = (time.perf_counter() - started) * 1000
+    response["Server-Timing"] = ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+    return response
+
+
+@api_view(["GET"])
+def product_cache_stats(request):
+    """
+    Hit/miss counters of the product cache of this process, used to size it.
+    """
+    return Response(cache_stats())
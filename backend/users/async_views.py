@@ -0,0 +1,27 @@
+"""
+Async version of the cart read, for the ASGI read path (backend/async_urls.py).
+"""
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from backend.mongo_async import async_collection
+from products.async_views import fetch_products
+from .authentication import async_authenticated
+from .cart_service import CART_PROJECTION, _user_filter, serialize_cart
+from .models import User
+
+
+@require_GET
+@async_authenticated
+async def get_user_cart(request, user_id):
+    """
+    GET /api/async/users/cart/<user_id>/
+    """
+    user_filter = _user_filter(user_id)
+    if not user_filter:
+        return JsonResponse({"items": []})
+
+    doc = await async_collection(User).find_one(user_filter, CART_PROJECTION)
+    cart = (doc or {}).get("cartData", [])
+    products = await fetch_products(item["product_id"] for item in cart)
+    return JsonResponse({"items": serialize_cart(cart, products)})
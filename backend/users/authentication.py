@@ -0,0 +1,198 @@
+"""
+Stateless JWT authentication.
+
+LoginUser issues an HS256 token carrying the user's id, role and status.
+JWTAuthentication verifies it and puts a lightweight TokenUser on
+request.user without touching Mongo. Verified tokens are kept in a small
+TTL cache so repeated requests skip the signature check too. On views that
+allow anonymous access (all of them today: DEFAULT_PERMISSION_CLASSES is
+empty), an invalid or expired token is ignored and the request is anonymous,
+so a stale token left in a browser cannot lock its user out.
+
+BanUser / DeleteUser revoke every token of a user in the revoked_user
+collection, which every worker reads; UnBanUser lifts the revocation. Each
+process re-reads the (small) set of revoked ids at most every
+REVOCATION_TTL seconds.
+"""
+import functools
+import time
+from datetime import datetime, timedelta
+
+import jwt
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from rest_framework import authentication, exceptions
+from rest_framework.permissions import AllowAny
+
+from backend.lru import LRUCache
+from .models import RevokedUser
+
+DEFAULTS = {
+    "SECRET": None,           # falls back to SECRET_KEY
+    "ALGORITHM": "HS256",
+    "LIFETIME_HOURS": 24,
+    "CACHE_SIZE": 4096,       # verified tokens kept per process
+    "CACHE_TTL": 300,         # seconds a verified token is trusted without re-checking the signature
+    "REVOCATION_TTL": 5,      # seconds before a ban made by another worker is seen
+}
+
+
+def _config():
+    config = {**DEFAULTS, **getattr(settings, "JWT_AUTH", {})}
+    config["SECRET"] = config["SECRET"] or settings.SECRET_KEY
+    return config
+
+
+class TokenUser:
+    """
+    The principal of an authenticated request: just what the token carries.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, role, status):
+        self.id = id
+        self.role = role
+        self.status = status
+
+    @property
+    def is_admin(self):
+        return self.role == "Admin"
+
+    def __str__(self):
+        return self.id
+
+
+def issue_token(user):
+    config = _config()
+    payload = {
+        "user_id": str(user.id),
+        "role": getattr(user, "role", "User"),
+        "status": getattr(user, "status", "Active"),
+        "exp": datetime.utcnow() + timedelta(hours=config["LIFETIME_HOURS"]),
+    }
+    return jwt.encode(payload, config["SECRET"], algorithm=config["ALGORITHM"])
+
+
+# ---- Revocation (ban) list ----
+_revoked = None  # (loaded at, revoked user ids)
+
+
+def revoke_user(user_id):
+    """
+    Rejects every token of user_id. Kept for the token lifetime; older tokens have expired by then.
+    """
+    expires_at = datetime.utcnow() + timedelta(hours=_config()["LIFETIME_HOURS"])
+    RevokedUser._get_collection().update_one(
+        {"_id": str(user_id)}, {"$set": {"expires_at": expires_at}}, upsert=True
+    )
+    _forget_revocations()
+
+
+def restore_user(user_id):
+    RevokedUser._get_collection().delete_one({"_id": str(user_id)})
+    _forget_revocations()
+
+
+def _forget_revocations():
+    global _revoked
+    _revoked = None
+
+
+def is_revoked(user_id):
+    global _revoked
+    if _revoked is None or time.monotonic() - _revoked[0] > _config()["REVOCATION_TTL"]:
+        rows = RevokedUser._get_collection().find({"expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1})
+        _revoked = (time.monotonic(), frozenset(row["_id"] for row in rows))
+    return str(user_id) in _revoked[1]
+
+
+# ---- Verification ----
+_verified = None
+
+
+def _verified_tokens():
+    global _verified
+    if _verified is None:
+        config = _config()
+        _verified = LRUCache(config["CACHE_SIZE"], config["CACHE_TTL"])
+    return _verified
+
+
+def decode_token(token):
+    """
+    Returns the TokenUser of a valid token. Raises AuthenticationFailed otherwise.
+    """
+    cached = _verified_tokens().get(token)
+    if cached is not None:
+        principal, expires = cached
+        if expires > datetime.utcnow().timestamp():
+            return principal
+
+    config = _config()
+    try:
+        payload = jwt.decode(token, config["SECRET"], algorithms=[config["ALGORITHM"]])
+    except jwt.ExpiredSignatureError:
+        raise exceptions.AuthenticationFailed("Token expired")
+    except jwt.InvalidTokenError:
+        raise exceptions.AuthenticationFailed("Invalid token")
+
+    if "user_id" not in payload:
+        raise exceptions.AuthenticationFailed("Invalid token")
+
+    principal = TokenUser(payload["user_id"], payload.get("role", "User"), payload.get("status", "Active"))
+    _verified_tokens().set(token, (principal, payload["exp"]))
+    return principal
+
+
+class JWTAuthentication(authentication.BaseAuthentication):
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None  # anonymous; views decide whether that is allowed
+        try:
+            if len(header) != 2:
+                raise exceptions.AuthenticationFailed("Invalid Authorization header")
+            token = header[1].decode("latin-1")
+            principal = decode_token(token)
+        except exceptions.AuthenticationFailed:
+            if allows_anonymous(getattr(request, "parser_context", {}).get("view")):
+                return None
+            raise
+
+        if principal.status != "Active" or is_revoked(principal.id):
+            raise exceptions.AuthenticationFailed("Account is banned")
+        return principal, token
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+
+def allows_anonymous(view):
+    """
+    True unless the DRF view has a permission class other than AllowAny.
+    Plain Django views (view is None) decide for themselves.
+    """
+    permissions = view.get_permissions() if view is not None else []
+    return not permissions or any(isinstance(permission, AllowAny) for permission in permissions)
+
+
+def async_authenticated(view):
+    """
+    JWTAuthentication for the plain async views of the ASGI read path:
+    sets request.user, or answers 401 like DRF would for a banned user.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            # The revocation check may read Mongo: keep it off the event loop
+            result = await sync_to_async(JWTAuthentication().authenticate)(request)
+        except exceptions.AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+        request.user = result[0] if result else AnonymousUser()
+        return await view(request, *args, **kwargs)
+    return wrapper
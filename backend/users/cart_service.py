@@ -1,97 +1,134 @@
-from .models import User, CartItem
-from products.models import Product
+from bson import ObjectId
+from pymongo import ReturnDocument
+from .models import User
+from products.cache import get_product, get_products
 
 
-def serialize_cart(cart_items):
+def serialize_cart(cart_items, products=None):
     """
-    Converts CartItem objects to JSON-serializable dicts
-    with full product data.
+    Converts raw cartData items to JSON-serializable dicts
+    with full product data. products ({product_id: serialized product})
+    may be passed in by callers that loaded them already.
     """
+    # Fetch full product info from the product cache (one $in query for the misses)
+    if products is None:
+        products = get_products(item["product_id"] for item in cart_items)
+
     serialized = []
     for item in cart_items:
-        # Fetch full product info from Product collection
-        product = Product.objects(id=item.product_id).first()
+        product = products.get(item["product_id"])
         if not product:
             continue  # skip if product doesn't exist
 
         serialized.append({
-            "_id": str(product.id),
-            "name": product.name,
-            "price": product.price,
-            "quantity": item.quantity,
-            "category": product.category,
-            "image_url": getattr(product, "image_url", ""),
-            "stock": getattr(product, "stock", 0),
-            "description": getattr(product, "description", ""),
-            "features": getattr(product, "features", []),
+            "_id": product["_id"],
+            "name": product["name"],
+            "price": product["price"],
+            "quantity": item.get("quantity", 1),
+            "category": product["category"],
+            "image_url": product["image_url"],
+            "stock": product["stock"],
+            "description": product["description"],
+            "features": product["features"],
         })
     return serialized
 
 
-def get_cart(user_id):
-    try:
-        user = User.objects(id=user_id).first()
-        if not user:
-            return {"items": []}
+# Every mutation below is a single atomic update that returns the new cart,
+# so concurrent requests on the same cart never overwrite each other.
+CART_PROJECTION = {"cartData": 1}
+
+
+def _user_filter(user_id):
+    if not ObjectId.is_valid(str(user_id)):
+        return None
+    return {"_id": ObjectId(str(user_id))}
+
+
+def _update_cart(query, update):
+    """
+    Applies update to the user matched by query and returns its cart items
+    (raw dicts), or None if nothing matched.
+    """
+    doc = User._get_collection().find_one_and_update(
+        query, update, projection=CART_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+    return None if doc is None else doc.get("cartData", [])
+
 
-        return {"items": serialize_cart(user.cartData)}
-    except Exception:
+def _read_cart(user_filter):
+    doc = User._get_collection().find_one(user_filter, CART_PROJECTION)
+    return None if doc is None else doc.get("cartData", [])
+
+
+def get_cart(user_id):
+    user_filter = _user_filter(user_id)
+    if not user_filter:
         return {"items": []}
 
+    cart = _read_cart(user_filter)
+    return {"items": serialize_cart(cart or [])}
+
 
 def add_to_cart(user_id, product_id):
-    user = User.objects(id=user_id).first()
-    product = Product.objects(id=product_id).first()
-    if not user or not product:
+    user_filter = _user_filter(user_id)
+    product = get_product(product_id)
+    if not user_filter or not product:
         return {"items": []}
 
-    # Check if product already in cart
-    for item in user.cartData:
-        if item.product_id == str(product_id):
-            item.quantity += 1
-            user.save()
-            return {"items": serialize_cart(user.cartData)}
+    product_id = str(product_id)
+    increment = ({**user_filter, "cartData.product_id": product_id},
+                 {"$inc": {"cartData.$.quantity": 1}})
+
+    # Already in cart: bump the quantity of the matched element
+    cart = _update_cart(*increment)
+    if cart is None:
+        # Not in cart: push it, unless another request pushed it in the meantime
+        cart = _update_cart(
+            {**user_filter, "cartData.product_id": {"$ne": product_id}},
+            {"$push": {"cartData": {
+                "product_id": product_id,
+                "name": product["name"],
+                "price": product["price"],
+                "quantity": 1,
+            }}},
+        )
+    if cart is None:
+        # Lost the race with a concurrent push (or the user does not exist)
+        cart = _update_cart(*increment)
+    if cart is None:
+        return {"items": []}
 
-    # Add new product to cart
-    user.cartData.append(CartItem(
-        product_id=str(product_id),
-        name=product.name,  # optional, can remove if always fetching full product
-        price=product.price,
-        quantity=1
-    ))
-    user.save()
-    return {"items": serialize_cart(user.cartData)}
+    return {"items": serialize_cart(cart)}
 
 
 def update_quantity(user_id, product_id, qty):
-    user = User.objects(id=user_id).first()
-    if not user:
+    user_filter = _user_filter(user_id)
+    if not user_filter:
         return {"items": []}
 
-    for item in user.cartData:
-        if item.product_id == str(product_id):
-            item.quantity = qty
-            user.save()
-            return {"items": serialize_cart(user.cartData)}
-
-    return {"items": serialize_cart(user.cartData)}
+    cart = _update_cart(
+        {**user_filter, "cartData.product_id": str(product_id)},
+        # At least 1: removing an item is remove_from_cart, and checkout rejects anything lower
+        {"$set": {"cartData.$.quantity": max(1, int(qty))}},
+    )
+    if cart is None:
+        # Product not in cart (or no such user): return the cart unchanged
+        cart = _read_cart(user_filter)
+    return {"items": serialize_cart(cart or [])}
 
 
 def remove_from_cart(user_id, product_id):
-    user = User.objects(id=user_id).first()
-    if not user:
+    user_filter = _user_filter(user_id)
+    if not user_filter:
         return {"items": []}
 
-    user.cartData = [item for item in user.cartData if item.product_id != str(product_id)]
-    user.save()
-    return {"items": serialize_cart(user.cartData)}
+    cart = _update_cart(user_filter, {"$pull": {"cartData": {"product_id": str(product_id)}}})
+    return {"items": serialize_cart(cart or [])}
 
 
 def clear_cart(user_id):
-    user = User.objects(id=user_id).first()
-    if not user:
-        return {"items": []}
-
-    user.cartData = []
-    user.save()
+    user_filter = _user_filter(user_id)
+    if user_filter:
+        User._get_collection().update_one(user_filter, {"$set": {"cartData": []}})
     return {"items": []}
@@ -0,0 +1,40 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from users.passwords import PasswordHasher
+
+
+class Command(BaseCommand):
+    help = 'Measure login (bcrypt check) throughput for increasing password pool sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8',
+                            help='Comma-separated pool sizes to try')
+        parser.add_argument('--logins', type=int, default=64,
+                            help='Number of password checks per run')
+        parser.add_argument('--rounds', type=int, default=12,
+                            help='bcrypt cost factor')
+
+    def handle(self, *args, **options):
+        sizes = [int(w) for w in options['workers'].split(',')]
+        logins = options['logins']
+
+        hashed = PasswordHasher(1, 0, options['rounds'], None).hash('correct horse battery staple')
+        self.stdout.write(f'{logins} logins per run, bcrypt cost {options["rounds"]}')
+
+        baseline = None
+        for workers in sizes:
+            # Queue large enough that no request is rejected during the benchmark
+            hasher = PasswordHasher(workers, logins, options['rounds'], None)
+            # Simulate many request threads calling check() concurrently
+            with ThreadPoolExecutor(max_workers=logins) as clients:
+                start = time.perf_counter()
+                results = list(clients.map(
+                    lambda _: hasher.check('correct horse battery staple', hashed), range(logins)
+                ))
+                elapsed = time.perf_counter() - start
+
+            assert all(results)
+            rate = logins / elapsed
+            baseline = baseline or rate
+            self.stdout.write(f'workers={workers:<3} {rate:8.1f} logins/s  x{rate / baseline:.2f}')
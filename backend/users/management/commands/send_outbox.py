@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from users.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Send queued transactional emails (OutboundEmail) over pooled SMTP connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Emails sent per SMTP connection')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep polling for new emails instead of exiting when the outbox is empty')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds to sleep between polls in --loop mode')
+
+    def handle(self, *args, **options):
+        totals = {"sent": 0, "retry": 0, "failed": 0}
+        while True:
+            counts = send_batch(options['batch_size'])
+            for key, value in counts.items():
+                totals[key] += value
+            if any(counts.values()):
+                self.stdout.write(f"sent={counts['sent']} retry={counts['retry']} failed={counts['failed']}")
+                continue  # there may be more due emails right away
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox done: {totals['sent']} sent, {totals['retry']} to retry, {totals['failed']} failed"
+        ))
@@ -1,5 +1,5 @@
 from mongoengine import Document, StringField, EmailField, ListField, EmbeddedDocument, EmbeddedDocumentField, IntField, FloatField, DateTimeField
-import bcrypt
+from . import passwords
 from datetime import datetime, timedelta
 import uuid
 
@@ -30,11 +30,30 @@ class User(Document):
     reset_token = StringField()
     reset_token_expiry = DateTimeField()
 
+    meta = {
+        # Indexes are built by `manage.py ensure_indexes`, not on first use
+        "auto_create_index": False,
+        # Back the filters / sort of the admin user list (get_all_users);
+        # email prefix search uses the unique email index
+        "indexes": [
+            "status",
+            "joined",
+            ("role", "joined"),
+            "full_name",
+            # ResetPassword looks users up by token; most users have none
+            {"fields": ["reset_token"], "sparse": True},
+        ]
+    }
+
+    # bcrypt runs on the bounded pool in users/passwords.py (503 when saturated)
     def set_password(self, raw_password):
-        self.password = bcrypt.hashpw(raw_password.encode(), bcrypt.gensalt()).decode()
+        self.password = passwords.hash_password(raw_password)
 
     def check_password(self, raw_password):
-        return bcrypt.checkpw(raw_password.encode(), self.password.encode())
+        return passwords.check_password(raw_password, self.password)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password)
 
     # 🔹 Generate a reset token valid for 1 hour
     def generate_reset_token(self):
@@ -48,4 +67,43 @@ class User(Document):
     def clear_reset_token(self):
         self.reset_token = None
         self.reset_token_expiry = None
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+# 📬 Transactional emails waiting to be sent by `manage.py send_outbox`
+class OutboundEmail(Document):
+    STATUS_CHOICES = ("pending", "sending", "sent", "failed")
+
+    subject = StringField(required=True)
+    body = StringField(required=True)              # plain text
+    html = StringField()                           # optional HTML alternative
+    from_email = StringField()
+    to = ListField(StringField(), required=True)
+
+    status = StringField(choices=STATUS_CHOICES, default="pending")
+    attempts = IntField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.utcnow)
+    locked_until = DateTimeField()                 # set while a worker is sending it
+    last_error = StringField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    sent_at = DateTimeField()
+
+    meta = {
+        "collection": "outbound_email",
+        "auto_create_index": False,  # manage.py ensure_indexes
+        "indexes": [("status", "next_attempt_at")],
+    }
+
+
+
+# 🚫 Users whose tokens are rejected (BanUser / DeleteUser), shared by every worker
+class RevokedUser(Document):
+    user_id = StringField(primary_key=True)
+    expires_at = DateTimeField(required=True)      # when the last token issued before the ban expires
+
+    meta = {
+        "collection": "revoked_user",
+        "auto_create_index": False,  # manage.py ensure_indexes
+        # The TTL monitor drops rows once no token they cover can still be valid
+        "indexes": [{"fields": ["expires_at"], "expireAfterSeconds": 0}],
+    }
@@ -0,0 +1,147 @@
+"""
+Transactional email outbox.
+
+Views only insert an OutboundEmail document and return. `manage.py send_outbox`
+claims due emails in batches, sends each batch over a single SMTP connection,
+and records the outcome; failures are retried with exponential backoff.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from pymongo import ReturnDocument
+
+from .models import OutboundEmail
+
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30      # 30s, 60s, 120s, ... between attempts
+LOCK_SECONDS = 300        # a claim held longer than this is considered abandoned
+
+
+def enqueue_email(subject, body, to, html=None, from_email=None):
+    """
+    Stores an email for the outbox worker. This is the only work done in the request.
+    """
+    return OutboundEmail(
+        subject=subject,
+        body=body,
+        html=html,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+    ).save()
+
+
+def enqueue_emails(emails):
+    """
+    Stores many emails with a single insert. emails: iterable of dicts with
+    subject, body, to and optionally html / from_email.
+    """
+    docs = [
+        OutboundEmail(
+            subject=e["subject"],
+            body=e["body"],
+            html=e.get("html"),
+            from_email=e.get("from_email") or settings.DEFAULT_FROM_EMAIL,
+            to=list(e["to"]),
+        )
+        for e in emails
+    ]
+    if docs:
+        OutboundEmail.objects.insert(docs, load_bulk=False)
+    return len(docs)
+
+
+def claim_due(limit, now=None):
+    """
+    Atomically marks up to `limit` due emails as "sending" and returns them (raw dicts).
+    Several workers can run side by side without sending the same email twice.
+    """
+    now = now or datetime.utcnow()
+    collection = OutboundEmail._get_collection()
+    claimed = []
+    while len(claimed) < limit:
+        doc = collection.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "locked_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "sending", "locked_until": now + timedelta(seconds=LOCK_SECONDS)}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            break
+        claimed.append(doc)
+    return claimed
+
+
+def _build_message(doc, connection):
+    msg = EmailMultiAlternatives(
+        subject=doc["subject"],
+        body=doc["body"],
+        from_email=doc.get("from_email"),
+        to=doc["to"],
+        connection=connection,
+    )
+    if doc.get("html"):
+        msg.attach_alternative(doc["html"], "text/html")
+    return msg
+
+
+def _record_result(doc, error, now):
+    collection = OutboundEmail._get_collection()
+    if error is None:
+        collection.update_one({"_id": doc["_id"]}, {
+            "$set": {"status": "sent", "sent_at": now, "last_error": None},
+            "$unset": {"locked_until": ""},
+            "$inc": {"attempts": 1},
+        })
+        return "sent"
+
+    attempts = doc.get("attempts", 0) + 1
+    status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+    collection.update_one({"_id": doc["_id"]}, {
+        "$set": {
+            "status": status,
+            "attempts": attempts,
+            "last_error": str(error)[:1000],
+            "next_attempt_at": now + timedelta(seconds=BACKOFF_SECONDS * 2 ** (attempts - 1)),
+        },
+        "$unset": {"locked_until": ""},
+    })
+    return status
+
+
+def send_batch(limit=100, connection=None):
+    """
+    Sends one batch of due emails over a single connection.
+    Returns {"sent": n, "retry": n, "failed": n}.
+    """
+    docs = claim_due(limit)
+    counts = {"sent": 0, "retry": 0, "failed": 0}
+    if not docs:
+        return counts
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Could not even connect: every claimed email goes back with a backoff
+        now = datetime.utcnow()
+        for doc in docs:
+            result = _record_result(doc, e, now)
+            counts["failed" if result == "failed" else "retry"] += 1
+        return counts
+
+    try:
+        for doc in docs:
+            try:
+                connection.send_messages([_build_message(doc, connection)])
+                error = None
+            except Exception as e:
+                error = e
+            result = _record_result(doc, error, datetime.utcnow())
+            counts[{"sent": "sent", "pending": "retry", "failed": "failed"}[result]] += 1
+    finally:
+        connection.close()
+    return counts
@@ -0,0 +1,101 @@
+"""
+Bounded worker pool for bcrypt.
+
+bcrypt releases the GIL, so hashing on a small thread pool runs in parallel
+on multiple cores instead of pinning the request threads. Requests that
+arrive while every worker is busy and the queue is full get a 503 instead
+of piling up behind the pool.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+import bcrypt
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    "WORKERS": os.cpu_count() or 1,  # threads hashing at the same time
+    "MAX_QUEUE": 32,                 # extra requests allowed to wait for a worker
+    "ROUNDS": 12,                    # bcrypt cost factor for new hashes
+    "TIMEOUT": 10,                   # seconds a request waits for its result
+}
+
+
+class PasswordHasherBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Server is busy, please try again in a moment."
+    default_code = "password_hasher_busy"
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, "PASSWORD_HASHING", {})}
+
+
+class PasswordHasher:
+    def __init__(self, workers, max_queue, rounds, timeout):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # Running + waiting jobs; acquiring never blocks, a full pool means 503
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeout:
+            raise PasswordHasherBusy()
+
+    def hash(self, raw_password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, raw_password.encode(), salt).decode()
+
+    def check(self, raw_password, hashed):
+        return self._run(bcrypt.checkpw, raw_password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed):
+        """
+        True if hashed was made with a different cost than the configured ROUNDS.
+        """
+        # bcrypt hashes look like $2b$12$<salt+hash>
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+
+_hasher = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher():
+    global _hasher
+    if _hasher is None:
+        with _hasher_lock:
+            if _hasher is None:
+                config = _config()
+                _hasher = PasswordHasher(
+                    config["WORKERS"], config["MAX_QUEUE"], config["ROUNDS"], config["TIMEOUT"]
+                )
+    return _hasher
+
+
+def hash_password(raw_password):
+    return get_hasher().hash(raw_password)
+
+
+def check_password(raw_password, hashed):
+    return get_hasher().check(raw_password, hashed)
+
+
+def needs_rehash(hashed):
+    return get_hasher().needs_rehash(hashed)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import User
+from stats.rollup import record_new_user
 
 class RegisterSerializer(serializers.Serializer):
     full_name = serializers.CharField()
@@ -19,4 +20,5 @@ class RegisterSerializer(serializers.Serializer):
         )
         user.set_password(validated_data['password'])
         user.save()
+        record_new_user(user)
         return user
\ No newline at end of file
@@ -1,7 +1,7 @@
 from django.urls import path
 from .views import (
     RegisterUser, LoginUser, DeleteUser, BanUser, UnBanUser, UpdateUser, 
-    UpdatePassword, ForgotPassword, ResetPassword, InviteUser,
+    UpdatePassword, ForgotPassword, ResetPassword, InviteUser, BulkInviteUsers,
     get_user_cart, add_user_cart, update_user_cart, remove_user_cart, clear_user_cart, get_all_users
 )
 
@@ -30,4 +30,5 @@ urlpatterns = [
     path("forgot-password/", ForgotPassword.as_view()),
     path("reset-password/", ResetPassword.as_view()),
     path("invite-user/", InviteUser.as_view(), name="invite-user"),
+    path("invite-users/bulk/", BulkInviteUsers.as_view(), name="bulk-invite-users"),
 ]
\ No newline at end of file
@@ -8,14 +8,24 @@ from rest_framework.decorators import api_view
 from datetime import datetime
 from django.core.mail import send_mail
 import os
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
+import csv
+import io
+from .outbox import enqueue_email, enqueue_emails
+from .authentication import issue_token, revoke_user, restore_user
+from orders.models import Order
+from orders.views import parse_date_param
+from mongoengine.queryset.visitor import Q
+from backend.pagination import InvalidCursor, paginate, parse_limit
+from stats.rollup import record_order, record_new_user
+from backend.conditional import bump_version
 from .cart_service import (
     get_cart, add_to_cart, update_quantity, remove_from_cart, clear_cart
 )
 
 
 class RegisterUser(APIView):
+    authentication_classes = []  # a stale token must not block these
+
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
 
@@ -34,6 +44,8 @@ class RegisterUser(APIView):
 
 
 class LoginUser(APIView):
+    authentication_classes = []  # a stale token must not block these
+
     def post(self, request):
         email = request.data.get('email')
         password = request.data.get('password')
@@ -54,17 +66,13 @@ class LoginUser(APIView):
                 "message": "Invalid email or password"
             }, status=status.HTTP_401_UNAUTHORIZED)
 
-        # You might need a custom JWT generation for MongoEngine users
-        # Example: using `simplejwt` requires a Django User model
-        # Or use another library like `jwt`:
-        import jwt
-        from datetime import datetime, timedelta
-        SECRET_KEY = "your-secret-key"  # from Django settings
-        payload = {
-            "user_id": str(user.id),
-            "exp": datetime.utcnow() + timedelta(hours=24)
-        }
-        access_token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+        # Upgrade the hash when the configured bcrypt cost has changed
+        if user.password_needs_rehash():
+            user.set_password(password)
+            User.objects(id=user.id).update_one(set__password=user.password)
+
+        # Stateless token checked by users.authentication.JWTAuthentication
+        access_token = issue_token(user)
 
         return Response({
             "success": True,
@@ -101,29 +109,89 @@ def remove_user_cart(request, user_id):
 def clear_user_cart(request, user_id):
     return Response(clear_cart(user_id))
 
+# Only these fields are ever read for the admin list (never the password hash or the cart)
+ADMIN_USER_FIELDS = ("full_name", "email", "role", "status", "joined")
+
+
 @api_view(["GET"])
 def get_all_users(request):
     """
     Return all users with id, full_name, email, role, status, joined.
+
+    Optional query params:
+      role=Admin / status=Active    exact filters
+      joined_from / joined_to       ISO dates, inclusive range on the join date
+      q=jo                          email or full name starting with q (case-sensitive, indexed)
+      limit / cursor                keyset pagination on (joined, _id), newest first; the
+                                    response becomes {"results": [...], "next_cursor": "...", "total": N}
+      count=false                   skip the total count of a paginated response
     """
-    users_list = []
-    for user in User.objects:
-        users_list.append({
-            "id": str(user.id),
-            "full_name": user.full_name,
-            "email": user.email,
-            "role": getattr(user, "role", "User"),
-            "status": getattr(user, "status", "Active"),
-            "joined": getattr(user, "joined", datetime.utcnow()).isoformat()
-        })
-    return Response(users_list)
+    params = request.query_params
+    try:
+        users = filter_users(User.objects(), params).only(*ADMIN_USER_FIELDS)
+        paginated = "limit" in params or "cursor" in params
+        limit = parse_limit(params.get("limit")) if paginated else None
+    except ValueError as e:
+        return Response({"success": False, "message": str(e)}, status=400)
+
+    if not paginated:
+        return Response([serialize_admin_user(raw) for raw in users.as_pymongo()])
+
+    try:
+        page, next_cursor = paginate(users.as_pymongo(), "joined", True, limit, params.get("cursor"))
+    except InvalidCursor as e:
+        return Response({"success": False, "message": str(e)}, status=400)
+
+    data = {
+        "results": [serialize_admin_user(raw) for raw in page],
+        "next_cursor": next_cursor,
+    }
+    if params.get("count", "true").lower() not in ("0", "false", "no"):
+        data["total"] = users.count()
+    return Response(data)
+
+
+def filter_users(users, params):
+    """
+    Pushes the role / status / join date / prefix filters of a request down to Mongo.
+    """
+    if params.get("role"):
+        users = users.filter(role=params["role"])
+    if params.get("status"):
+        users = users.filter(status=params["status"])
+    if params.get("joined_from"):
+        users = users.filter(joined__gte=parse_date_param(params["joined_from"]))
+    if params.get("joined_to"):
+        users = users.filter(joined__lte=parse_date_param(params["joined_to"], end_of_day=True))
+    prefix = params.get("q", "").strip()
+    if prefix:
+        # Anchored, case-sensitive regexes are index range scans
+        users = users.filter(Q(email__startswith=prefix) | Q(full_name__startswith=prefix))
+    return users
+
+
+def serialize_admin_user(raw):
+    return {
+        "id": str(raw["_id"]),
+        "full_name": raw.get("full_name"),
+        "email": raw.get("email"),
+        "role": raw.get("role", "User"),
+        "status": raw.get("status", "Active"),
+        "joined": (raw.get("joined") or datetime.utcnow()).isoformat()
+    }
 
 
 class DeleteUser(APIView):
     def delete(self, request, user_id):
         try:
             user = User.objects.get(id=user_id)
+            # Take the user and the orders the CASCADE is about to remove out of the daily rollup
+            for order in Order.objects(user=user).only("date", "status", "amount", "items"):
+                record_order(order, sign=-1)
+            record_new_user(user, sign=-1)
             user.delete()   # 🚀 CASCADE is executed here
+            revoke_user(user_id)
+            bump_version("orders")
             return Response({"message": "User and related orders deleted"}, status=200)
 
         except User.DoesNotExist:
@@ -136,6 +204,7 @@ class BanUser(APIView):
             user = User.objects.get(id=user_id)
             user.status = "Inactive"
             user.save()
+            revoke_user(user_id)
             return Response({"success": True, "message": "User has been banned"}, status=200)
         except User.DoesNotExist:
             return Response({"success": False, "message": "User not found"}, status=404)
@@ -146,6 +215,7 @@ class UnBanUser(APIView):
             user = User.objects.get(id=user_id)
             user.status = "Active"
             user.save()
+            restore_user(user_id)
             return Response({"success": True, "message": "User has been unbanned"}, status=200)
         except User.DoesNotExist:
             return Response({"success": False, "message": "User not found"}, status=404)
@@ -175,6 +245,8 @@ class UpdateUser(APIView):
             user.email = email
 
         user.save()
+        # Orders are served with the user's name and email
+        bump_version("orders")
 
         return Response({
             "success": True,
@@ -214,6 +286,8 @@ class UpdatePassword(APIView):
 
 
 class ForgotPassword(APIView):
+    authentication_classes = []  # a stale token must not block these
+
     def post(self, request):
         email = request.data.get("email")
 
@@ -264,14 +338,13 @@ class ForgotPassword(APIView):
         </html>
         """
 
-        msg = EmailMultiAlternatives(
+        # Queued; sent by the `send_outbox` worker
+        enqueue_email(
             subject="Password Reset Request",
             body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
+            html=html_content,
             to=[email],
         )
-        msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
 
         return Response({
             "success": True,
@@ -280,6 +353,8 @@ class ForgotPassword(APIView):
 
 
 class ResetPassword(APIView):
+    authentication_classes = []  # a stale token must not block these
+
     def post(self, request):
         token = request.data.get("token")
         new_password = request.data.get("password")
@@ -307,22 +382,10 @@ class ResetPassword(APIView):
         })
 
 
-class InviteUser(APIView):
-    def post(self, request):
-        email = request.data.get("email")
-        role = request.data.get("role", "User")
-
-        if not email:
-            return Response({"success": False, "message": "Email is required."}, status=400)
-
-        FRONTEND_URL = os.environ.get("ADMIN_FRONTEND_URL", "http://localhost:5174")
-        invite_url = f"{FRONTEND_URL}/?email={email}&role={role}"
-
-        # Plain text fallback
-        text_content = f"You are invited to join Campify! Register here: {invite_url}"
-
-        # HTML email
-        html_content = f"""
+# Invitation email, compiled once and filled in per address
+INVITE_SUBJECT = "Invitation to Join Campify"
+INVITE_TEXT_TEMPLATE = "You are invited to join Campify! Register here: {invite_url}"
+INVITE_HTML_TEMPLATE = """
         <html>
         <body style="font-family: Arial, sans-serif; background-color: #f4f4f4; padding: 20px;">
             <div style="max-width: 600px; margin: auto; background-color: #fff; padding: 30px; border-radius: 12px;
@@ -349,13 +412,130 @@ class InviteUser(APIView):
         </html>
         """
 
-        msg = EmailMultiAlternatives(
-            subject="Invitation to Join Campify",
+
+def build_invite_email(email, role):
+    """
+    Returns (text, html) of the invitation email for one address.
+    """
+    FRONTEND_URL = os.environ.get("ADMIN_FRONTEND_URL", "http://localhost:5174")
+    invite_url = f"{FRONTEND_URL}/?email={email}&role={role}"
+    return (
+        INVITE_TEXT_TEMPLATE.format(invite_url=invite_url),
+        INVITE_HTML_TEMPLATE.format(invite_url=invite_url, role=role),
+    )
+
+
+class InviteUser(APIView):
+    def post(self, request):
+        email = request.data.get("email")
+        role = request.data.get("role", "User")
+
+        if not email:
+            return Response({"success": False, "message": "Email is required."}, status=400)
+
+        text_content, html_content = build_invite_email(email, role)
+
+        # Queued; sent by the `send_outbox` worker
+        enqueue_email(
+            subject=INVITE_SUBJECT,
             body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
+            html=html_content,
             to=[email],
         )
-        msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
 
-        return Response({"success": True, "message": f"Invitation sent to {email}."})
\ No newline at end of file
+        return Response({"success": True, "message": f"Invitation sent to {email}."})
+
+
+MAX_BULK_INVITES = 1000
+
+
+def parse_bulk_invites(request):
+    """
+    Reads [(email, role), ...] from either a JSON list
+    ({"invites": [{"email": ..., "role": ...}]}) or CSV lines "email,role"
+    ({"csv": "..."} or an uploaded "file").
+    """
+    if "file" in request.FILES:
+        text = request.FILES["file"].read().decode("utf-8-sig")
+        return list(csv_invites(text))
+    if request.data.get("csv"):
+        return list(csv_invites(request.data["csv"]))
+
+    invites = request.data.get("invites")
+    if not isinstance(invites, list):
+        raise ValueError("Send a list of invites, a csv string or a CSV file.")
+    return [
+        ((i.get("email") or "").strip(), (i.get("role") or "User").strip())
+        for i in invites if isinstance(i, dict)
+    ]
+
+
+def csv_invites(text):
+    for row in csv.reader(io.StringIO(text)):
+        if not row or not row[0].strip() or row[0].strip().lower() == "email":
+            continue  # blank line or header
+        role = row[1].strip() if len(row) > 1 and row[1].strip() else "User"
+        yield row[0].strip(), role
+
+
+class BulkInviteUsers(APIView):
+    """
+    POST /api/users/invite-users/bulk/
+    Invites many addresses at once. Addresses that are invalid, repeated or
+    already registered are skipped; the others are queued in one insert and
+    sent by the outbox worker over a single SMTP connection.
+    Returns one result per address.
+    """
+    def post(self, request):
+        try:
+            invites = parse_bulk_invites(request)
+        except (ValueError, UnicodeDecodeError) as e:
+            return Response({"success": False, "message": str(e)}, status=400)
+
+        if not invites:
+            return Response({"success": False, "message": "No invitations given."}, status=400)
+        if len(invites) > MAX_BULK_INVITES:
+            return Response({
+                "success": False,
+                "message": f"At most {MAX_BULK_INVITES} invitations per request."
+            }, status=400)
+
+        # One query for every address that already has an account
+        candidates = {email for email, _ in invites} | {email.lower() for email, _ in invites}
+        registered = {
+            u["email"].lower()
+            for u in User.objects(email__in=list(candidates)).only("email").as_pymongo()
+        }
+
+        results = []
+        emails = []
+        seen = set()
+        for email, role in invites:
+            key = email.lower()
+            if not email or "@" not in email:
+                results.append({"email": email, "status": "invalid_email"})
+            elif role not in User.ROLE_CHOICES:
+                results.append({"email": email, "status": "invalid_role"})
+            elif key in seen:
+                results.append({"email": email, "status": "duplicate"})
+            elif key in registered:
+                results.append({"email": email, "status": "already_registered"})
+            else:
+                seen.add(key)
+                text_content, html_content = build_invite_email(email, role)
+                emails.append({
+                    "subject": INVITE_SUBJECT,
+                    "body": text_content,
+                    "html": html_content,
+                    "to": [email],
+                })
+                results.append({"email": email, "role": role, "status": "queued"})
+
+        queued = enqueue_emails(emails)
+
+        return Response({
+            "success": True,
+            "message": f"{queued} invitation(s) queued.",
+            "results": results,
+        })
+
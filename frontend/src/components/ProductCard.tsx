@@ -10,6 +10,7 @@ interface Product {
   price: number;
   category: string;
   image_url: string;
+  image_variants?: Record<string, string>;
   stock: number;
 }
 
@@ -20,14 +21,16 @@ interface ProductCardProps {
 const ProductCard = ({ product }: ProductCardProps) => {
   const { addToCart } = useCart();
   const { apiUrl } = useApi();
+  // Resized copy of uploaded images, when the backend generated one
+  const imageUrl = product.image_variants?.card || product.image_url;
 
   return (
     <div className="product-card">
       <Link to={`/product/${product._id}`}>
         <div className="product-card-image-wrapper">
-          <img src={ product.image_url.startsWith("http://") || product.image_url.startsWith("https://")
-            ? product.image_url // full URL, use as-is
-            : `${apiUrl}/uploads/${product.image_url}` // local file
+          <img src={ imageUrl.startsWith("http://") || imageUrl.startsWith("https://")
+            ? imageUrl // full URL, use as-is
+            : `${apiUrl}/uploads/${imageUrl}` // local file
             }
             alt={product.name}
             className="product-card-image"
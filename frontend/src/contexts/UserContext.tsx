@@ -50,6 +50,24 @@ export const UserProvider: React.FC<{ children: React.ReactNode }> = ({ children
     window.location.href = "/";
   };
 
+  // A rejected token (expired, signed with an old key, banned user): forget the
+  // session so the next requests go out anonymously instead of failing forever
+  useEffect(() => {
+    const interceptor = axios.interceptors.response.use(
+      (response) => response,
+      (err) => {
+        if (err.response?.status === 401 && err.config?.headers?.Authorization) {
+          localStorage.removeItem("userData");
+          localStorage.removeItem("token");
+          setUser(null);
+          setToken(null);
+        }
+        return Promise.reject(err);
+      }
+    );
+    return () => axios.interceptors.response.eject(interceptor);
+  }, []);
+
 
   const updateUser = async (data: { full_name?: string; email?: string }) => {
     if (!user) return;